@@ -0,0 +1,91 @@
+"""memory per model and construction throughput of api.User.
+
+    python benchmarks/bench_models.py [count]
+"""
+import sys, time, tracemalloc
+
+from marzpy.api.user import User
+
+
+class DictUser:
+    """previous ``__dict__`` based User, kept for comparison."""
+
+    def __init__(self, username, proxies, inbounds, data_limit, data_limit_reset_strategy="no_reset",
+                 status="", expire=0, used_traffic=0, lifetime_used_traffic=0, created_at="", links=[],
+                 subscription_url="", excluded_inbounds={}, note="", on_hold_timeout=0,
+                 on_hold_expire_duration=0, sub_updated_at=0, online_at=0, sub_last_user_agent=""):
+        self.username = username
+        self.proxies = proxies
+        self.inbounds = inbounds
+        self.expire = expire
+        self.data_limit = data_limit
+        self.data_limit_reset_strategy = data_limit_reset_strategy
+        self.status = status
+        self.used_traffic = used_traffic
+        self.lifetime_used_traffic = lifetime_used_traffic
+        self.created_at = created_at
+        self.links = links
+        self.subscription_url = subscription_url
+        self.excluded_inbounds = excluded_inbounds
+        self.note = note
+        self.on_hold_timeout = on_hold_timeout
+        self.on_hold_expire_duration = on_hold_expire_duration
+        self.sub_last_user_agent = sub_last_user_agent
+        self.online_at = online_at
+        self.sub_updated_at = sub_updated_at
+
+
+def make_users(count):
+    shared_proxies = {"vless": {"id": "35e7e39c-7d5c-1f4b-8b71-508e4f37ff53"}}
+    shared_inbounds = {"vless": ["VLESS TCP REALITY"]}
+    return [
+        {
+            "username": f"user{i}",
+            "proxies": shared_proxies,
+            "inbounds": shared_inbounds,
+            "expire": 1700000000 + i,
+            "data_limit": 10 * 1024**3,
+            "data_limit_reset_strategy": "no_reset",
+            "status": "active",
+            "used_traffic": i * 1024,
+            "lifetime_used_traffic": i * 2048,
+            "created_at": "2024-01-01T00:00:00",
+            "links": [],
+            "subscription_url": f"/sub/token{i}",
+            "excluded_inbounds": {},
+            "note": "",
+            "on_hold_timeout": None,
+            "on_hold_expire_duration": 0,
+            "sub_updated_at": None,
+            "online_at": None,
+            "sub_last_user_agent": None,
+        }
+        for i in range(count)
+    ]
+
+
+def measure(cls, rows):
+    start = time.perf_counter()
+    for row in rows:
+        cls(**row)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [cls(**row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return len(rows) / elapsed, (after - before) / len(rows)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_users(count)
+    for cls in (DictUser, User):
+        rate, per_object = measure(cls, rows)
+        print(f"{cls.__name__:10} {rate:12,.0f} objects/s {per_object:8.1f} bytes/object")
+
+
+if __name__ == "__main__":
+    main()
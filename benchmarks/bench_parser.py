@@ -0,0 +1,70 @@
+"""subscription parsing speed on synthetic payloads.
+
+    python benchmarks/bench_parser.py [links per subscription] [subscriptions]
+"""
+import base64, json, sys, time
+
+from marzpy.api.parser import iter_configs, parse_subscription, parse_subscriptions
+
+
+def make_links(count):
+    links = []
+    for i in range(count):
+        uuid = f"35e7e39c-7d5c-1f4b-8b71-{i:012d}"
+        kind = i % 4
+        if kind == 0:
+            links.append(
+                f"vless://{uuid}@host{i}.example.com:443?security=reality&type=grpc&serviceName=svc"
+                f"&sni=www.example.com&fp=chrome&pbk=key&sid=ab#VLESS%20{i}"
+            )
+        elif kind == 1:
+            vmess = {"v": "2", "ps": f"VMess {i}", "add": f"host{i}.example.com", "port": "443", "id": uuid,
+                     "net": "ws", "type": "none", "host": "cdn.example.com", "path": "/ws", "tls": "tls"}
+            links.append("vmess://" + base64.b64encode(json.dumps(vmess).encode()).decode())
+        elif kind == 2:
+            links.append(f"trojan://{uuid}@host{i}.example.com:443?security=tls&type=tcp&sni=host{i}.example.com#Trojan%20{i}")
+        else:
+            userinfo = base64.urlsafe_b64encode(f"chacha20-ietf-poly1305:{uuid}".encode()).decode()
+            links.append(f"ss://{userinfo}@host{i}.example.com:8388#SS%20{i}")
+    return links
+
+
+def make_body(count):
+    return base64.b64encode("\n".join(make_links(count)).encode())
+
+
+def chunked(body, size=16384):
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    subscriptions = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    body = make_body(links)
+    print(f"{links:,} links per subscription, {len(body) / 1024:.0f} KiB body")
+
+    elapsed, text = timed(lambda: base64.b64decode(body).decode().splitlines())
+    print(f"{'naive decode + split':28} {elapsed * 1000:8.1f} ms  ({len(text)} lines, unparsed)")
+
+    elapsed, configs = timed(parse_subscription, body)
+    print(f"{'parse_subscription':28} {elapsed * 1000:8.1f} ms  {len(configs) / elapsed:10,.0f} links/s")
+
+    elapsed, configs = timed(lambda: list(iter_configs(chunked(body))))
+    print(f"{'iter_configs 16 KiB chunks':28} {elapsed * 1000:8.1f} ms  {len(configs) / elapsed:10,.0f} links/s")
+
+    bodies = [body] * subscriptions
+    elapsed, _ = timed(lambda: [parse_subscription(b) for b in bodies])
+    print(f"{f'{subscriptions} bodies, 1 process':28} {elapsed * 1000:8.1f} ms  {links * subscriptions / elapsed:10,.0f} links/s")
+    elapsed, _ = timed(parse_subscriptions, bodies)
+    print(f"{f'{subscriptions} bodies, process pool':28} {elapsed * 1000:8.1f} ms  {links * subscriptions / elapsed:10,.0f} links/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""report queries over list of api.User objects vs api.snapshot.UsersSnapshot.
+
+    python benchmarks/bench_snapshot.py [count]
+"""
+import random, sys, time
+
+from marzpy.api.snapshot import UsersSnapshot, numpy
+from marzpy.api.user import User
+
+NOW = 1_700_000_000
+DAY = 86400
+GB = 1024**3
+
+
+def make_rows(count, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        limit = rng.choice((0, 10 * GB, 50 * GB))
+        rows.append(
+            {
+                "username": f"user{i}",
+                "proxies": {"vless": {"id": "35e7e39c-7d5c-1f4b-8b71-508e4f37ff53"}},
+                "inbounds": {"vless": ["VLESS TCP REALITY"]},
+                "status": rng.choice(("active", "active", "active", "limited", "expired")),
+                "data_limit": limit,
+                "used_traffic": rng.randrange(60 * GB),
+                "expire": NOW + rng.randrange(-30 * DAY, 90 * DAY),
+                "online_at": rng.choice((None, f"2023-11-{rng.randrange(1, 14):02d}T12:00:00")),
+            }
+        )
+    return rows
+
+
+def objects_report(users):
+    top = sorted(users, key=lambda u: u.used_traffic, reverse=True)[:10]
+    near = [u for u in users if u.data_limit and u.used_traffic >= u.data_limit * 0.9]
+    expiring = [u for u in users if NOW <= u.expire <= NOW + 7 * DAY]
+    total = sum(u.used_traffic for u in users)
+    return len(top), len(near), len(expiring), total
+
+
+def snapshot_report(snapshot):
+    top = snapshot.top("used_traffic", 10)
+    near = snapshot.near_data_limit(0.9)
+    expiring = snapshot.expiring_within(7 * DAY, now=NOW)
+    total = snapshot.sum("used_traffic")
+    return len(top), len(near), len(expiring), total
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(count)
+    print(f"{count:,} users, backend: {'numpy' if numpy is not None else 'array'}")
+
+    build, users = timed(lambda: [User(**row) for row in rows])
+    query, result = timed(objects_report, users)
+    print(f"objects   build {build * 1000:8.1f} ms  first report {query * 1000:8.1f} ms  {result}")
+
+    build, snapshot = timed(UsersSnapshot, rows)
+    query, result = timed(snapshot_report, snapshot)
+    again, _ = timed(snapshot_report, snapshot)
+    print(
+        f"snapshot  build {build * 1000:8.1f} ms  first report {query * 1000:8.1f} ms"
+        f"  next report {again * 1000:8.1f} ms  {result}"
+    )
+
+
+if __name__ == "__main__":
+    main()
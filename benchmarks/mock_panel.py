@@ -0,0 +1,356 @@
+"""in-process fake Marzban panel for benchmarks.
+
+    panel = MockPanel(users=10_000, latency=0.005, error_rate=0.01)
+    address = await panel.start()
+    ...
+    await panel.stop()
+"""
+import asyncio, base64, json, random, time
+
+from aiohttp import web
+
+
+def _b64(data: bytes):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_jwt(subject: str, lifetime: int = 86400):
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64(json.dumps({"sub": subject, "exp": int(time.time()) + lifetime}).encode())
+    return f"{header}.{payload}.{_b64(b'signature')}"
+
+
+def make_user(index: int, rng: random.Random):
+    username = f"user{index:06d}"
+    uuid = f"35e7e39c-7d5c-1f4b-8b71-{index:012d}"
+    return {
+        "username": username,
+        "proxies": {"vless": {"id": uuid, "flow": ""}},
+        "inbounds": {"vless": ["VLESS TCP REALITY"]},
+        "expire": int(time.time()) + rng.randrange(-10, 90) * 86400,
+        "data_limit": rng.choice((0, 10 * 1024**3, 50 * 1024**3)),
+        "data_limit_reset_strategy": "no_reset",
+        "status": rng.choice(("active", "active", "active", "limited", "expired")),
+        "used_traffic": rng.randrange(60 * 1024**3),
+        "lifetime_used_traffic": rng.randrange(600 * 1024**3),
+        "created_at": "2024-01-01T00:00:00",
+        "links": [f"vless://{uuid}@example.com:443?security=reality&type=tcp#{username}"],
+        "subscription_url": f"/sub/{username}token",
+        "excluded_inbounds": {"vless": []},
+        "note": None,
+        "on_hold_timeout": None,
+        "on_hold_expire_duration": None,
+        "sub_updated_at": None,
+        "online_at": None,
+        "sub_last_user_agent": None,
+    }
+
+
+class MockPanel:
+    """fake panel implementing the endpoints used by marzpy.
+
+    Parameters:
+        users (``int``) : number of generated users
+        nodes (``int``) : number of generated nodes
+        latency (``float``) : seconds added to every api response
+        jitter (``float``) : random extra latency up to this many seconds
+        error_rate (``float``) : share of api requests answered with 502
+        seed (``int``) : random seed of the dataset and injected faults
+    """
+
+    def __init__(self, users=1000, nodes=5, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.users = {}
+        for index in range(users):
+            user = make_user(index, self.rng)
+            self.users[user["username"]] = user
+        self.nodes = {
+            node_id: {
+                "id": node_id,
+                "name": f"node{node_id}",
+                "address": f"node{node_id}.example.com",
+                "port": 62050,
+                "api_port": 62051,
+                "usage_coefficient": 1,
+                "xray_version": "1.8.4",
+                "status": "connected",
+                "message": None,
+            }
+            for node_id in range(1, nodes + 1)
+        }
+        self.templates = {
+            1: {
+                "id": 1,
+                "name": "default",
+                "inbounds": {"vless": ["VLESS TCP REALITY"]},
+                "data_limit": 10 * 1024**3,
+                "expire_duration": 30 * 86400,
+                "username_prefix": "t_",
+                "username_suffix": "",
+            }
+        }
+        self.hosts = {"VLESS TCP REALITY": [{"remark": "host", "address": "example.com", "port": 443}]}
+        self.xray_config = {"log": {"loglevel": "warning"}, "inbounds": [{"tag": "VLESS TCP REALITY"}]}
+        self.access_token = make_jwt("admin")
+        self.requests = 0
+        self._runner = None
+
+    # -- plumbing --
+
+    @web.middleware
+    async def _faults(self, request, handler):
+        if request.path.startswith("/api/"):
+            self.requests += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                return web.json_response({"detail": "injected error"}, status=502)
+            if request.path != "/api/admin/token":
+                if request.headers.get("Authorization") != f"bearer {self.access_token}":
+                    return web.json_response({"detail": "Could not validate credentials"}, status=401)
+        return await handler(request)
+
+    def app(self):
+        app = web.Application(middlewares=[self._faults])
+        route = app.router
+        route.add_post("/api/admin/token", self.token)
+        route.add_get("/api/admin", self.current_admin)
+        route.add_get("/api/system", self.system)
+        route.add_get("/api/inbounds", self.inbounds)
+        route.add_get("/api/hosts", self.get_hosts)
+        route.add_put("/api/hosts", self.put_hosts)
+        route.add_get("/api/core", self.core)
+        route.add_post("/api/core/restart", self.ok)
+        route.add_get("/api/core/config", self.get_config)
+        route.add_put("/api/core/config", self.put_config)
+        route.add_post("/api/user", self.add_user)
+        route.add_get("/api/user/{username}", self.get_user)
+        route.add_put("/api/user/{username}", self.modify_user)
+        route.add_delete("/api/user/{username}", self.delete_user)
+        route.add_post("/api/user/{username}/reset", self.reset_user)
+        route.add_post("/api/user/{username}/revoke_sub", self.get_user)
+        route.add_get("/api/user/{username}/usage", self.user_usage)
+        route.add_get("/api/users", self.list_users)
+        route.add_post("/api/users/reset", self.ok)
+        route.add_get("/api/user_template", self.list_templates)
+        route.add_post("/api/user_template", self.add_template)
+        route.add_get("/api/user_template/{id}", self.get_template)
+        route.add_put("/api/user_template/{id}", self.modify_template)
+        route.add_delete("/api/user_template/{id}", self.delete_template)
+        route.add_get("/api/nodes", self.list_nodes)
+        route.add_get("/api/nodes/usage", self.nodes_usage)
+        route.add_post("/api/node", self.add_node)
+        route.add_get("/api/node/{id}", self.get_node)
+        route.add_put("/api/node/{id}", self.modify_node)
+        route.add_delete("/api/node/{id}", self.delete_node)
+        route.add_post("/api/node/{id}/reconnect", self.ok)
+        route.add_get("/sub/{token}/info", self.subscription_info)
+        route.add_get("/sub/{token}/", self.subscription)
+        route.add_get("/sub/{token}", self.subscription)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """serve the panel, returns its address e.g. ``http://127.0.0.1:53211``."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # -- handlers --
+
+    async def ok(self, request):
+        return web.json_response({})
+
+    async def token(self, request):
+        form = await request.post()
+        if not form.get("username") or not form.get("password"):
+            return web.json_response({"detail": "Incorrect username or password"}, status=401)
+        return web.json_response({"access_token": self.access_token, "token_type": "bearer"})
+
+    async def current_admin(self, request):
+        return web.json_response({"username": "admin", "is_sudo": True})
+
+    async def system(self, request):
+        return web.json_response(
+            {
+                "version": "0.4.9",
+                "mem_total": 8 * 1024**3,
+                "mem_used": 2 * 1024**3,
+                "cpu_cores": 4,
+                "cpu_usage": 12.5,
+                "total_user": len(self.users),
+                "users_active": sum(user["status"] == "active" for user in self.users.values()),
+                "incoming_bandwidth": 0,
+                "outgoing_bandwidth": 0,
+            }
+        )
+
+    async def inbounds(self, request):
+        inbound = {"tag": "VLESS TCP REALITY", "protocol": "vless", "network": "tcp"}
+        return web.json_response({"vless": [inbound]})
+
+    async def get_hosts(self, request):
+        return web.json_response(self.hosts)
+
+    async def put_hosts(self, request):
+        self.hosts = await request.json()
+        return web.json_response(self.hosts)
+
+    async def core(self, request):
+        return web.json_response({"version": "1.8.4", "started": True, "logs_websocket": "/api/core/logs"})
+
+    async def get_config(self, request):
+        return web.json_response(self.xray_config)
+
+    async def put_config(self, request):
+        self.xray_config = await request.json()
+        return web.json_response(self.xray_config)
+
+    def _user_or_404(self, request):
+        user = self.users.get(request.match_info["username"])
+        if user is None:
+            raise web.HTTPNotFound(
+                text=json.dumps({"detail": "User not found"}), content_type="application/json"
+            )
+        return user
+
+    async def add_user(self, request):
+        body = await request.json()
+        if body["username"] in self.users:
+            return web.json_response({"detail": "User already exists"}, status=409)
+        user = {**make_user(0, self.rng), **body, "used_traffic": 0}
+        user["subscription_url"] = f"/sub/{user['username']}token"
+        self.users[user["username"]] = user
+        return web.json_response(user)
+
+    async def get_user(self, request):
+        return web.json_response(self._user_or_404(request))
+
+    async def modify_user(self, request):
+        user = self._user_or_404(request)
+        user.update({key: value for key, value in (await request.json()).items() if value is not None})
+        return web.json_response(user)
+
+    async def delete_user(self, request):
+        self._user_or_404(request)
+        del self.users[request.match_info["username"]]
+        return web.json_response({})
+
+    async def reset_user(self, request):
+        user = self._user_or_404(request)
+        user["used_traffic"] = 0
+        return web.json_response(user)
+
+    async def user_usage(self, request):
+        self._user_or_404(request)
+        usages = [
+            {"node_id": node_id, "node_name": node["name"], "used_traffic": 0}
+            for node_id, node in self.nodes.items()
+        ]
+        return web.json_response({"usages": usages})
+
+    async def list_users(self, request):
+        query = request.query
+        users = list(self.users.values())
+        usernames = query.getall("username", [])
+        if usernames:
+            users = [user for user in users if user["username"] in usernames]
+        if "status" in query:
+            users = [user for user in users if user["status"] == query["status"]]
+        if "sort" in query:
+            field = query["sort"].lstrip("-")
+            users.sort(key=lambda user: user.get(field) or 0, reverse=query["sort"].startswith("-"))
+        total = len(users)
+        offset = int(query.get("offset", 0))
+        limit = query.get("limit")
+        users = users[offset : offset + int(limit)] if limit else users[offset:]
+        return web.json_response({"users": users, "total": total})
+
+    def _by_id(self, collection, request):
+        item = collection.get(int(request.match_info["id"]))
+        if item is None:
+            raise web.HTTPNotFound(
+                text=json.dumps({"detail": "Not found"}), content_type="application/json"
+            )
+        return item
+
+    async def list_templates(self, request):
+        return web.json_response(list(self.templates.values()))
+
+    async def add_template(self, request):
+        template = await request.json()
+        template["id"] = max(self.templates, default=0) + 1
+        self.templates[template["id"]] = template
+        return web.json_response(template)
+
+    async def get_template(self, request):
+        return web.json_response(self._by_id(self.templates, request))
+
+    async def modify_template(self, request):
+        template = self._by_id(self.templates, request)
+        template.update(await request.json())
+        template["id"] = int(request.match_info["id"])
+        return web.json_response(template)
+
+    async def delete_template(self, request):
+        self._by_id(self.templates, request)
+        del self.templates[int(request.match_info["id"])]
+        return web.json_response({})
+
+    async def list_nodes(self, request):
+        return web.json_response(list(self.nodes.values()))
+
+    async def nodes_usage(self, request):
+        return web.json_response(
+            {
+                "usages": [
+                    {"node_id": node_id, "node_name": node["name"], "uplink": 0, "downlink": 0}
+                    for node_id, node in self.nodes.items()
+                ]
+            }
+        )
+
+    async def add_node(self, request):
+        node = await request.json()
+        node["id"] = max(self.nodes, default=0) + 1
+        self.nodes[node["id"]] = node
+        return web.json_response(node)
+
+    async def get_node(self, request):
+        return web.json_response(self._by_id(self.nodes, request))
+
+    async def modify_node(self, request):
+        node = self._by_id(self.nodes, request)
+        node.update(await request.json())
+        node["id"] = int(request.match_info["id"])
+        return web.json_response(node)
+
+    async def delete_node(self, request):
+        self._by_id(self.nodes, request)
+        del self.nodes[int(request.match_info["id"])]
+        return web.json_response({})
+
+    def _subscriber(self, request):
+        username = request.match_info["token"].removesuffix("token")
+        user = self.users.get(username)
+        if user is None:
+            raise web.HTTPNotFound()
+        return user
+
+    async def subscription_info(self, request):
+        return web.json_response(self._subscriber(request))
+
+    async def subscription(self, request):
+        user = self._subscriber(request)
+        return web.Response(text=base64.b64encode("\n".join(user["links"]).encode()).decode())
@@ -0,0 +1,112 @@
+"""throughput, latency and memory of marzpy against the in-process mock panel.
+
+    python benchmarks/run.py --users 20000 --requests 2000 --concurrency 50 --latency 0.002
+"""
+import argparse, asyncio, statistics, time, tracemalloc
+
+from mock_panel import MockPanel
+
+from marzpy import Marzban
+from marzpy.api.user import User
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def report(name, count, elapsed, latencies=None, memory=None):
+    line = f"{name:28} {count:8} ops {count / elapsed:10.1f} ops/s"
+    if latencies:
+        p50 = statistics.median(latencies) * 1000
+        p99 = percentile(latencies, 0.99) * 1000
+        line += f"  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+    if memory is not None:
+        line += f"  peak {memory / 1024**2:7.1f} MiB"
+    print(line)
+
+
+async def timed_calls(count, concurrency, call):
+    latencies = []
+    queue = iter(range(count))
+
+    async def worker():
+        for index in queue:
+            start = time.perf_counter()
+            await call(index)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+async def measure_memory(coroutine):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await coroutine
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+async def main(args):
+    mock = MockPanel(users=args.users, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    address = await mock.start()
+    usernames = list(mock.users)
+    try:
+        async with Marzban("admin", "admin", address, limit=args.concurrency) as panel:
+            await panel.get_valid_token()
+
+            elapsed, latencies = await timed_calls(
+                args.requests, 1, lambda i: panel.get_user(usernames[i % len(usernames)])
+            )
+            report("get_user sequential", args.requests, elapsed, latencies)
+
+            elapsed, latencies = await timed_calls(
+                args.requests, args.concurrency, lambda i: panel.get_user(usernames[i % len(usernames)])
+            )
+            report(f"get_user x{args.concurrency}", args.requests, elapsed, latencies)
+
+            elapsed, latencies = await timed_calls(
+                args.requests, args.concurrency, lambda i: panel.get_system_stats()
+            )
+            report(f"get_system_stats x{args.concurrency}", args.requests, elapsed, latencies)
+
+            new_users = (
+                User(f"bulk{i:06d}", proxies={"vless": {}}, inbounds={"vless": ["VLESS TCP REALITY"]})
+                for i in range(args.requests)
+            )
+            operation = panel.bulk_add_users(new_users, concurrency=args.concurrency)
+            await operation
+            report(
+                f"bulk_add_users x{args.concurrency} ({operation.stats.failed} failed)",
+                operation.stats.total,
+                operation.stats.elapsed,
+            )
+
+            elapsed, peak, users = await measure_memory(panel.get_all_users())
+            report("get_all_users", len(users), elapsed, memory=peak)
+            del users
+
+            async def iterate():
+                return sum([1 async for _ in panel.iter_users(page_size=args.page_size)])
+
+            elapsed, peak, count = await measure_memory(iterate())
+            report(f"iter_users page={args.page_size}", count, elapsed, memory=peak)
+    finally:
+        await mock.stop()
+    print(f"mock panel served {mock.requests} api requests")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000, help="users in the mock dataset")
+    parser.add_argument("--requests", type=int, default=1000, help="calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="coroutines issuing calls")
+    parser.add_argument("--page-size", type=int, default=1000, help="iter_users page size")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added per api response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of responses answered with 502")
+    asyncio.run(main(parser.parse_args()))
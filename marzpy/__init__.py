@@ -1 +1,3 @@
 from .marzban import Marzban
+from .fleet import MarzbanFleet
+from .blocking import SyncMarzban
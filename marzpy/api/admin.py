@@ -1,72 +1,127 @@
 from .send_requests import *
-import aiohttp,json
+from .exceptions import AuthenticationError
+import json,base64,time,asyncio
 
 class Admin:
+    # refresh the cached token this many seconds before it expires
+    token_refresh_margin = 60
+
     def __init__(self, username: str, password: str, panel_address: str):
         self.username = username
         self.password = password
         self.panel_address = panel_address
+        self._token = None
+        self._token_expire = None
+        self._token_lock = None
 
     async def get_token(self):
         """login for Authorization token
 
+        Raises ``AuthenticationError`` when the panel refuses the credentials;
+        other error statuses and connection errors are raised as aiohttp errors.
+
         Returns: `~dict`: Authorization token
         """
+        async with self.session.request(
+            "post",
+            url = f"{self.panel_address}/api/admin/token",
+            data = {"username": self.username, "password": self.password},
+            timeout = self.timeout,
+            ) as response :
+            if response.status in (401, 403):
+                body = await response.text()
+                try:
+                    detail = json.loads(body).get("detail", body)
+                except (ValueError, AttributeError):
+                    detail = body
+                raise AuthenticationError(detail or "Incorrect username or password")
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+            result["panel_address"] = self.panel_address
+            return result
+
+    @staticmethod
+    def _decode_token_expire(access_token: str):
+        """read ``exp`` claim of jwt access token, None if it has no expiry."""
         try:
-            async with aiohttp.request(
-                "post",
-                url = f"{self.panel_address}/api/admin/token",
-                data = {"username": self.username, "password": self.password},
-                ) as response :
-                # response.raise_for_status()  # Raise an exception for non-200 status codes
-                result = await response.json()
-                result["panel_address"] = self.panel_address
-                return result
-        except aiohttp.exceptions.RequestException as ex:
-            print(f"Request Exception: {ex}")
-            return None
-        except json.JSONDecodeError as ex:
-            print(f"JSON Decode Error: {ex}")
+            payload = access_token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        except (IndexError, ValueError, AttributeError):
             return None
 
-    async def get_current_admin(self, token: dict):
+    def _token_is_fresh(self):
+        if self._token is None:
+            return False
+        if self._token_expire is None:
+            return True
+        return time.time() < self._token_expire - self.token_refresh_margin
+
+    async def get_valid_token(self, stale: dict = None):
+        """get cached Authorization token, login again when it is missing or about to expire.
+
+        Only one login runs at a time; concurrent callers wait for it and share the result.
+
+        Parameters:
+            stale (``dict``, optional) : token the panel rejected, forces a refresh
+                unless another coroutine already replaced it
+
+        Returns: `~dict`: Authorization token
+        """
+        if stale is None and self._token_is_fresh():
+            return self._token
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self._token_is_fresh() and (stale is None or self._token is not stale):
+                return self._token
+            token = await self.get_token()
+            if not token or "access_token" not in token:
+                raise AuthenticationError(
+                    (token or {}).get("detail", "could not get Authorization token")
+                )
+            self._token = token
+            self._token_expire = self._decode_token_expire(token["access_token"])
+            return token
+
+    async def get_current_admin(self, token: dict = None):
         """get current admin who has logged in.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns:
         `~dict`: {"username": "str" , "is_sudo": true}
         """
-        return await send_request(endpoint="admin", token=token, method="get")
+        return await self.send_request(endpoint="admin", token=token, method="get")
 
-    async def create_admin(self, token: dict, data: dict):
+    async def create_admin(self, token: dict = None, data: dict = None):
         """add new admin.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
             data (``dict``) : information of new admin
 
         Returns:
         `~dict`: username && is_sudo
         """
-        await send_request(endpoint="admin", token=token, method="post", data=data)
+        await self.send_request(endpoint="admin", token=token, method="post", data=data)
         return "success"
 
-    async def change_admin_password(self, username: str, token: dict, data: dict):
+    async def change_admin_password(self, username: str, token: dict = None, data: dict = None):
         """change exist admins password.
 
         *you cant modify sudo admins password*
 
         Parameters:
             username (``str``) : username of admin
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
             data (``dict``) : information of new admin
 
         Returns:
         `~dict`: username && is_sudo
         """
-        await send_request(
+        await self.send_request(
             endpoint=f"admin/{username}",
             token=token,
             method="put",
@@ -74,26 +129,26 @@ class Admin:
         )
         return "success"
 
-    async def delete_admin(self, username: str, token: dict):
+    async def delete_admin(self, username: str, token: dict = None):
         """delete admin.
 
         Parameters:
             username (``str``) : username of admin
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns:
         `~str`: success
         """
-        await send_request(endpoint=f"admin/{username}", token=token, method="delete")
+        await self.send_request(endpoint=f"admin/{username}", token=token, method="delete")
         return "success"
 
-    async def get_all_admins(self, token: dict):
+    async def get_all_admins(self, token: dict = None):
         """get all admins.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns:
         `~list`: [{username && is_sudo}]
         """
-        return await send_request(endpoint=f"admins", token=token, method="get")
\ No newline at end of file
+        return await self.send_request(endpoint=f"admins", token=token, method="get")
\ No newline at end of file
@@ -0,0 +1,117 @@
+import asyncio
+
+from .user import User
+
+
+class UserWriteBuffer:
+    """merge frequent user edits into one PUT per user.
+
+    ``modify`` records field changes and returns a future. Changes to the same
+    username made within ``window`` seconds of the first one are merged (a
+    later value of a field replaces an earlier one) and sent as one PUT with
+    only those fields. Writes of one user are sent one after another in the
+    order they were made; changes arriving while a PUT is in flight go into
+    the next one. ``flush`` and ``close`` send everything pending right away.
+    ``puts`` counts the PUTs sent and ``merged`` the calls that joined one
+    already pending instead of causing another.
+
+    Parameters:
+        panel (``Marzban``) : client used for the requests
+        window (``float``) : seconds changes of a user are collected
+        token (``dict``, optional) : Authorization token
+    """
+
+    def __init__(self, panel, window: float = 0.5, token: dict = None):
+        self.panel = panel
+        self.window = window
+        self.token = token
+        self.puts = 0
+        self.merged = 0
+        self.closed = False
+        self._pending = {}
+        self._tasks = {}
+        self._flushing = None
+
+    def modify(self, user_username: str, changes: dict = None, **fields):
+        """queue changes of a user.
+
+        Parameters:
+            user_username (``str``) : username of user
+
+            changes (``dict``, optional) : fields to change e.g. {"expire": 1735689600}
+
+            **fields : fields to change, merged over ``changes``
+
+        Returns: `~asyncio.Future`: api.User object after the PUT that included the changes
+        """
+        if self.closed:
+            raise RuntimeError("UserWriteBuffer is closed")
+        changes = {**(changes or {}), **fields}
+        unknown = set(changes) - set(User._fields)
+        if unknown:
+            raise ValueError(f"unknown user fields: {', '.join(sorted(unknown))}")
+        if self._flushing is None:
+            self._flushing = asyncio.Event()
+        future = asyncio.get_running_loop().create_future()
+        if user_username in self._pending:
+            # joins a PUT that was going to be sent anyway
+            self.merged += 1
+        pending, futures = self._pending.setdefault(user_username, ({}, []))
+        pending.update(changes)
+        futures.append(future)
+        if user_username not in self._tasks:
+            self._tasks[user_username] = asyncio.ensure_future(self._run(user_username))
+        return future
+
+    async def _run(self, user_username):
+        try:
+            while user_username in self._pending:
+                if not self._flushing.is_set():
+                    try:
+                        await asyncio.wait_for(self._flushing.wait(), self.window)
+                    except asyncio.TimeoutError:
+                        pass
+                changes, futures = self._pending.pop(user_username)
+                try:
+                    request = await self.panel.send_request(
+                        f"user/{user_username}", self.token, "put", changes
+                    )
+                    self.puts += 1
+                    user = User(**request)
+                except Exception as ex:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(ex)
+                else:
+                    for future in futures:
+                        if not future.done():
+                            future.set_result(user)
+        finally:
+            del self._tasks[user_username]
+
+    @property
+    def pending(self):
+        """number of users with unsent changes."""
+        return len(self._pending)
+
+    async def flush(self):
+        """send all pending changes now and wait for the PUTs."""
+        if self._flushing is None:
+            return
+        self._flushing.set()
+        try:
+            while self._tasks:
+                await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        finally:
+            self._flushing.clear()
+
+    async def close(self):
+        """flush and stop accepting changes."""
+        self.closed = True
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
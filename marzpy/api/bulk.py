@@ -0,0 +1,118 @@
+import asyncio, time
+
+
+class BulkResult:
+    def __init__(self, item, result=None, error: Exception = None):
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BulkStats:
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def throughput(self):
+        """completed items per second."""
+        elapsed = self.elapsed
+        return self.total / elapsed if elapsed else 0.0
+
+
+class BulkOperation:
+    """run an async function over many items with at most ``concurrency`` in flight.
+
+    Iterate it with ``async for`` to receive a ``BulkResult`` for every item in
+    completion order; ``stats`` holds the aggregate counters and throughput.
+    Items are pulled lazily, so ``items`` may be a generator of any size; an
+    exception raised by ``items`` ends the operation and is raised after the
+    results already produced.
+    """
+
+    def __init__(self, func, items, concurrency: int = 10, stop_on_error: bool = False):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.func = func
+        self.items = items
+        self.concurrency = concurrency
+        self.stop_on_error = stop_on_error
+        self.stats = BulkStats()
+
+    def __aiter__(self):
+        return self._run()
+
+    def __await__(self):
+        return self.collect().__await__()
+
+    async def collect(self):
+        """run the whole operation and return list of results."""
+        return [result async for result in self]
+
+    async def _run(self):
+        items = iter(self.items)
+        results = asyncio.Queue()
+        stopped = False
+        failure = None
+
+        async def worker():
+            nonlocal stopped, failure
+            while not stopped:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                except Exception as ex:
+                    # the shared iterator is broken, stop every worker and raise it from _run
+                    if failure is None:
+                        failure = ex
+                    stopped = True
+                    return
+                try:
+                    result = BulkResult(item, result=await self.func(item))
+                except Exception as ex:
+                    result = BulkResult(item, error=ex)
+                await results.put(result)
+
+        async def supervise(workers):
+            await asyncio.gather(*workers, return_exceptions=True)
+            await results.put(None)
+
+        self.stats.started_at = time.perf_counter()
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        supervisor = asyncio.ensure_future(supervise(workers))
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                self.stats.total += 1
+                if result.ok:
+                    self.stats.succeeded += 1
+                else:
+                    self.stats.failed += 1
+                yield result
+                if not result.ok and self.stop_on_error:
+                    stopped = True
+                    break
+            if failure is not None:
+                raise failure
+        finally:
+            stopped = True
+            for task in workers:
+                task.cancel()
+            supervisor.cancel()
+            self.stats.finished_at = time.perf_counter()
@@ -0,0 +1,118 @@
+import copy, time
+from collections import OrderedDict
+from fnmatch import fnmatch
+
+# endpoint patterns worth caching and the writes that make them stale
+DEFAULT_CACHED_ENDPOINTS = (
+    "inbounds",
+    "hosts",
+    "user_template",
+    "user_template/*",
+    "core/config",
+    "nodes",
+    "node/*",
+)
+DEFAULT_INVALIDATIONS = {
+    "hosts": ("hosts", "inbounds"),
+    "user_template": ("user_template", "user_template/*"),
+    "user_template/*": ("user_template", "user_template/*"),
+    "core/config": ("core/config", "inbounds", "hosts"),
+    "core/restart": ("nodes", "node/*"),
+    "node": ("nodes", "node/*"),
+    "node/*": ("nodes", "node/*"),
+}
+
+
+class TTLCache:
+    """TTL read-through cache with LRU eviction for GET responses.
+
+    Only endpoints matching ``ttls`` are cached. A write (POST/PUT/DELETE) to
+    an endpoint listed in ``invalidations`` drops the matching cached entries
+    and bumps their generation; a response whose request started before that
+    (read ``generation`` first and pass it to ``set``) is not stored.
+
+    Parameters:
+        ttl (``float``) : seconds an entry stays valid
+        maxsize (``int``) : maximum entries, least recently used are evicted first
+        ttls (``dict or iterable``) : endpoint fnmatch patterns to cache, optionally
+            mapped to their own ttl
+        invalidations (``dict``) : write endpoint pattern -> cached patterns it invalidates
+    """
+
+    def __init__(
+        self, ttl: float = 30, maxsize: int = 256, ttls=DEFAULT_CACHED_ENDPOINTS, invalidations=None
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        if not isinstance(ttls, dict):
+            ttls = dict.fromkeys(ttls, ttl)
+        self.ttls = ttls
+        self.invalidations = DEFAULT_INVALIDATIONS if invalidations is None else invalidations
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _ttl(self, path):
+        for pattern, ttl in self.ttls.items():
+            if fnmatch(path, pattern):
+                return ttl
+        return None
+
+    def get(self, key):
+        """return (True, value) for a fresh entry, (False, None) otherwise."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, copy.deepcopy(entry[1])
+
+    def generation(self, path):
+        """changes whenever cached entries of ``path`` are invalidated."""
+        return self._epoch, sum(
+            count for pattern, count in self._generations.items() if fnmatch(path, pattern)
+        )
+
+    def set(self, key, path, value, generation=None):
+        """store ``value``; the last item of ``key`` must be the endpoint path.
+
+        Nothing is stored when ``generation`` is given and ``path`` was
+        invalidated since it was read.
+        """
+        ttl = self._ttl(path)
+        if ttl is None:
+            return
+        if generation is not None and generation != self.generation(path):
+            return
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def is_cached(self, path):
+        return self._ttl(path) is not None
+
+    def invalidate(self, path=None):
+        """drop entries invalidated by a write to ``path``, or everything when omitted."""
+        if path is None:
+            self._entries.clear()
+            self._epoch += 1
+            return
+        patterns = set()
+        for write, stale in self.invalidations.items():
+            if fnmatch(path, write):
+                patterns.update(stale)
+        if not patterns:
+            return
+        for pattern in patterns:
+            self._generations[pattern] = self._generations.get(pattern, 0) + 1
+        for key in [key for key in self._entries if any(fnmatch(key[-1], p) for p in patterns)]:
+            del self._entries[key]
+
+    def metrics(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
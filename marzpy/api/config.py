@@ -0,0 +1,315 @@
+import asyncio, copy, logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigChange:
+    """one structural difference between two configs.
+
+    ``op`` is "add", "remove" or "change" and ``path`` the keys leading to the
+    value; list items that carry a ``tag`` (inbounds, outbounds) are addressed
+    by tag instead of index.
+    """
+
+    __slots__ = ("op", "path", "old", "new")
+
+    def __init__(self, op: str, path: tuple, old=None, new=None):
+        self.op = op
+        self.path = path
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"ConfigChange({self.op!r}, {'.'.join(map(str, self.path))!r})"
+
+
+def _by_tag(items):
+    if not all(isinstance(item, dict) and "tag" in item for item in items):
+        return None
+    tagged = {item["tag"]: item for item in items}
+    return tagged if len(tagged) == len(items) else None
+
+
+def diff_config(old, new, path: tuple = ()):
+    """structural diff of two json values.
+
+    Returns: `~list`: [ConfigChange], empty when both are equal
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in old:
+            if key not in new:
+                changes.append(ConfigChange("remove", path + (key,), old=old[key]))
+            else:
+                changes.extend(diff_config(old[key], new[key], path + (key,)))
+        for key in new:
+            if key not in old:
+                changes.append(ConfigChange("add", path + (key,), new=new[key]))
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        old_tags, new_tags = _by_tag(old), _by_tag(new)
+        # tags kept in the same order: report added, removed and changed items by tag
+        if (
+            old_tags is not None
+            and new_tags is not None
+            and [tag for tag in old_tags if tag in new_tags]
+            == [tag for tag in new_tags if tag in old_tags]
+        ):
+            return diff_config(old_tags, new_tags, path)
+        if len(old) == len(new):
+            changes = []
+            for index, (old_item, new_item) in enumerate(zip(old, new)):
+                changes.extend(diff_config(old_item, new_item, path + (index,)))
+            return changes
+    return [ConfigChange("change", path, old, new)]
+
+
+def _split(path):
+    return tuple(path.split(".")) if isinstance(path, str) else tuple(path)
+
+
+class ConfigTransaction:
+    """edits applied together to the xray config, or not at all.
+
+    Edits are recorded and only run when the transaction is committed, on a
+    copy of the latest config; if one of them raises none of them is kept.
+    Used as ``async with`` it commits on exit unless the block raised.
+    """
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.edits = []
+        self.changes = None
+
+    def update(self, func):
+        """add an edit: ``func(config)`` changes the dict in place or returns a new one."""
+        self.edits.append(func)
+        return self
+
+    def set(self, path, value):
+        """set a value, ``path`` is a dotted string or a tuple of keys."""
+        *parents, key = _split(path)
+
+        def edit(config):
+            node = config
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[key] = copy.deepcopy(value)
+
+        return self.update(edit)
+
+    def delete(self, path):
+        *parents, key = _split(path)
+
+        def edit(config):
+            node = config
+            for parent in parents:
+                node = node[parent]
+            del node[key]
+
+        return self.update(edit)
+
+    def add_inbound(self, inbound: dict):
+        """append an inbound, raises ValueError when its tag is taken."""
+
+        def edit(config):
+            inbounds = config.setdefault("inbounds", [])
+            if any(item.get("tag") == inbound.get("tag") for item in inbounds):
+                raise ValueError(f"inbound {inbound.get('tag')!r} already exists")
+            inbounds.append(copy.deepcopy(inbound))
+
+        return self.update(edit)
+
+    def remove_inbound(self, tag: str):
+        def edit(config):
+            inbounds = config.get("inbounds", [])
+            kept = [item for item in inbounds if item.get("tag") != tag]
+            if len(kept) == len(inbounds):
+                raise KeyError(f"inbound {tag!r} not found")
+            config["inbounds"] = kept
+
+        return self.update(edit)
+
+    def add_routing_rule(self, rule: dict, first: bool = False):
+        """add a routing rule, at the top when ``first`` so it wins over existing rules."""
+
+        def edit(config):
+            rules = config.setdefault("routing", {}).setdefault("rules", [])
+            rules.insert(0 if first else len(rules), copy.deepcopy(rule))
+
+        return self.update(edit)
+
+    async def commit(self):
+        """apply the edits, coalesced with other pending transactions.
+
+        Returns: `~list`: [ConfigChange] written by the PUT that included this
+        transaction, empty when the config did not change
+        """
+        self.changes = await self.editor._submit(self.edits)
+        return self.changes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.commit()
+
+
+class XrayConfigEditor:
+    """edit the xray config with as few PUTs and core restarts as possible.
+
+    The config is requested once and kept; transactions committed while a
+    PUT is in flight (or within ``delay`` seconds of each other) are applied
+    in order to one copy and written by a single PUT, which is skipped when
+    the structural diff is empty. If a PUT fails the kept config is dropped
+    and requested again by the next commit.
+
+    The panel restarts xray itself when the config is PUT. With ``restart``
+    an extra ``restart_xray_core`` is sent ``restart_delay`` seconds after the
+    last write, so a burst of commits still causes at most one restart. A
+    failed restart is logged and raised by the next ``flush`` or ``close``.
+
+    Parameters:
+        panel (``Marzban``) : client used for the config requests
+        token (``dict``, optional) : Authorization token
+        delay (``float``) : seconds commits are collected before a PUT
+        restart (``bool``) : send a debounced restart after writes
+        restart_delay (``float``) : seconds without writes before the restart
+    """
+
+    def __init__(
+        self,
+        panel,
+        token: dict = None,
+        delay: float = 0.05,
+        restart: bool = False,
+        restart_delay: float = 2.0,
+    ):
+        self.panel = panel
+        self.token = token
+        self.delay = delay
+        self.restart = restart
+        self.restart_delay = restart_delay
+        self.config = None
+        self.puts = 0
+        self.restarts = 0
+        self._pending = []
+        self._worker = None
+        self._restart_task = None
+        self._restart_error = None
+
+    def transaction(self):
+        """new ConfigTransaction of this editor."""
+        return ConfigTransaction(self)
+
+    async def edit(self, func):
+        """commit a single edit, see ``ConfigTransaction.update``.
+
+        Returns: `~list`: [ConfigChange]
+        """
+        return await self.transaction().update(func).commit()
+
+    async def refresh(self):
+        """request the config again, e.g. after it was changed elsewhere.
+
+        Returns: `~dict`: xray config
+        """
+        self.config = await self.panel.get_xray_config(self.token)
+        return self.config
+
+    async def _submit(self, edits):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((list(edits), future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._drain())
+        return await future
+
+    async def _drain(self):
+        while self._pending:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            batch, self._pending = self._pending, []
+            try:
+                await self._commit(batch)
+            except Exception as ex:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(ex)
+
+    async def _commit(self, batch):
+        base = self.config if self.config is not None else await self.refresh()
+        config = base
+        applied = []
+        for edits, future in batch:
+            if future.done():
+                # committer was cancelled before its edits were applied
+                continue
+            candidate = copy.deepcopy(config)
+            try:
+                for edit in edits:
+                    result = edit(candidate)
+                    if result is not None:
+                        candidate = result
+            except Exception as ex:
+                future.set_exception(ex)
+                continue
+            config = candidate
+            applied.append(future)
+        changes = diff_config(base, config)
+        if changes:
+            self.config = None
+            await self.panel.modify_xray_config(self.token, config)
+            self.config = config
+            self.puts += 1
+            if self.restart:
+                self._schedule_restart()
+        for future in applied:
+            if not future.done():
+                future.set_result(changes)
+
+    def _schedule_restart(self):
+        if self._restart_task is not None:
+            self._restart_task.cancel()
+        self._restart_task = asyncio.ensure_future(self._delayed_restart())
+
+    async def _delayed_restart(self):
+        await asyncio.sleep(self.restart_delay)
+        self._restart_task = None
+        try:
+            await self._restart_now()
+        except Exception as ex:
+            self._restart_error = ex
+            logger.error("XrayConfigEditor restart failed: %s", ex)
+
+    async def _restart_now(self):
+        await self.panel.restart_xray_core(self.token)
+        self.restarts += 1
+
+    async def flush(self):
+        """wait for pending commits and send a scheduled restart right away.
+
+        Raises the error of a failed restart, including one that ran in the
+        background since the last flush.
+        """
+        while self._worker is not None and not self._worker.done():
+            await asyncio.shield(self._worker)
+        if self._restart_task is not None:
+            self._restart_task.cancel()
+            self._restart_task = None
+            self._restart_error = None
+            await self._restart_now()
+        if self._restart_error is not None:
+            error, self._restart_error = self._restart_error, None
+            raise error
+
+    async def close(self):
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
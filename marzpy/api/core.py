@@ -1,53 +1,115 @@
 from .send_requests import *
+from .config import XrayConfigEditor
+from .logs import LogStream
+import json
 
 
 class Core:
     def __init__(self) -> None:
         pass
 
-    async def get_xray_core(self, token: dict):
+    async def get_xray_core(self, token: dict = None):
         """get xray core.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~dict`: xray core
         """
-        return await send_request(endpoint="core", token=token, method="get")
+        return await self.send_request(endpoint="core", token=token, method="get")
 
-    async def restart_xray_core(self, token: dict):
+    async def restart_xray_core(self, token: dict = None):
         """restart xray core.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~str`: success
         """
-        await send_request(endpoint="core/restart", token=token, method="post")
+        await self.send_request(
+            endpoint="core/restart", token=token, method="post", idempotent=True
+        )
         return "success"
 
-    async def get_xray_config(self, token: dict):
+    async def get_xray_config(self, token: dict = None):
         """get xray config.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~dict`: xray config
         """
-        return await send_request(endpoint="core/config", token=token, method="get")
+        return await self.send_request(endpoint="core/config", token=token, method="get")
 
-    async def modify_xray_config(self, token: dict, config: json):
+    async def modify_xray_config(self, token: dict = None, config: json = None):
         """edit xray config.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
             config (``json``): json of new config
 
         Returns:
             `~str`: success
         """
-        await send_request(endpoint="core/config", token=token, method="put", data=config)
-        return "success"
\ No newline at end of file
+        await self.send_request(endpoint="core/config", token=token, method="put", data=config)
+        return "success"
+
+    def xray_config_editor(
+        self,
+        token: dict = None,
+        delay: float = 0.05,
+        restart: bool = False,
+        restart_delay: float = 2.0,
+    ):
+        """editor that batches xray config changes into few PUTs.
+
+        Parameters:
+            token (``dict``, optional): Authorization token
+
+            delay (``float``): seconds commits are collected before a PUT
+
+            restart (``bool``): send one debounced core restart after writes
+
+            restart_delay (``float``): seconds without writes before the restart
+
+        Returns:
+            `~XrayConfigEditor`: api.config.XrayConfigEditor object
+        """
+        return XrayConfigEditor(self, token, delay, restart, restart_delay)
+
+    def stream_core_logs(
+        self,
+        token: dict = None,
+        interval: float = None,
+        maxsize: int = 1000,
+        policy: str = "drop_oldest",
+        level: str = None,
+        pattern=None,
+        reconnect: bool = True,
+    ):
+        """stream xray core logs over WebSocket.
+
+        Parameters:
+            token (``dict``, optional): Authorization token
+
+            interval (``float``, optional): seconds the panel batches lines for
+
+            maxsize (``int``): buffered lines
+
+            policy (``str``): "drop_oldest" or "block" when the buffer is full
+
+            level (``str``, optional): lowest level kept: debug, info, warning or error
+
+            pattern (``str`` or ``re.Pattern``, optional): keep only matching lines
+
+            reconnect (``bool``): reopen the socket when it closes
+
+        Returns:
+            `~LogStream`: async iterator of log lines
+        """
+        return LogStream(
+            self, "core/logs", token, interval, maxsize, policy, level, pattern, reconnect
+        )
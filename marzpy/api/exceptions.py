@@ -0,0 +1,16 @@
+class MarzpyError(Exception):
+    """base class of marzpy errors."""
+
+
+class AuthenticationError(MarzpyError):
+    """panel refused the admin credentials."""
+
+
+class SubscriptionError(MarzpyError):
+    """subscription link answered with an error status."""
+
+    def __init__(self, sub_link: str, status: int, detail: str = ""):
+        super().__init__(f"{sub_link}: {status} {detail}".strip())
+        self.sub_link = sub_link
+        self.status = status
+        self.detail = detail
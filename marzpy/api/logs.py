@@ -0,0 +1,193 @@
+import asyncio, logging, re
+from collections import deque
+from urllib.parse import urlencode
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+LEVEL_PATTERN = re.compile(r"\[(Debug|Info|Warning|Error)\]", re.IGNORECASE)
+
+
+def log_level(line: str):
+    """level of an Xray log line, lines without ``[Level]`` (access log) count as info."""
+    match = LEVEL_PATTERN.search(line, 0, 64)
+    return LEVELS[match.group(1).lower()] if match else LEVELS["info"]
+
+
+class LogStream:
+    """async iterator of log lines from a panel log WebSocket.
+
+    Lines are read by a background task into a buffer of ``maxsize`` lines.
+    When the consumer falls behind, ``policy="drop_oldest"`` discards the
+    oldest buffered line (counted in ``dropped``) and ``policy="block"`` stops
+    reading from the socket until there is room. ``level`` and ``pattern`` are
+    checked before a line is buffered, so filtered lines never take memory.
+    The socket is reopened with exponential backoff when it closes or fails;
+    ``reconnects`` counts the attempts and ``failures`` the failed connections.
+
+    Parameters:
+        panel (``Marzban``) : client whose session and token are used
+        endpoint (``str``) : api path e.g. ``core/logs``
+        token (``dict``, optional) : Authorization token
+        interval (``float``, optional) : seconds the panel batches lines for
+        maxsize (``int``) : buffered lines
+        policy (``str``) : "drop_oldest" or "block"
+        level (``str``, optional) : lowest level kept: debug, info, warning or error
+        pattern (``str`` or ``re.Pattern``, optional) : keep only lines matching it
+        reconnect (``bool``) : end the iteration when the socket closes if False
+        backoff (``float``) : seconds before the first reconnect, doubled after each failure
+        max_backoff (``float``) : upper bound of the wait between reconnects
+    """
+
+    def __init__(
+        self,
+        panel,
+        endpoint: str,
+        token: dict = None,
+        interval: float = None,
+        maxsize: int = 1000,
+        policy: str = "drop_oldest",
+        level: str = None,
+        pattern=None,
+        reconnect: bool = True,
+        backoff: float = 1,
+        max_backoff: float = 30,
+    ):
+        if policy not in ("drop_oldest", "block"):
+            raise ValueError("policy must be 'drop_oldest' or 'block'")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.panel = panel
+        self.endpoint = endpoint
+        self.token = token
+        self.interval = interval
+        self.maxsize = maxsize
+        self.policy = policy
+        self.min_level = LEVELS[level.lower()] if level else None
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.reconnect = reconnect
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.dropped = 0
+        self.reconnects = 0
+        self.failures = 0
+        self._lines = deque()
+        self._readable = None
+        self._writable = None
+        self._error = None
+        self._finished = False
+        self._task = None
+
+    def accepts(self, line: str):
+        if self.min_level is not None and log_level(line) < self.min_level:
+            return False
+        return self.pattern is None or self.pattern.search(line) is not None
+
+    async def _put(self, line: str):
+        while len(self._lines) >= self.maxsize:
+            if self.policy == "drop_oldest":
+                self._lines.popleft()
+                self.dropped += 1
+                continue
+            self._writable.clear()
+            await self._writable.wait()
+        self._lines.append(line)
+        self._readable.set()
+
+    def _url(self, token: dict):
+        params = {"token": token["access_token"]}
+        if self.interval is not None:
+            params["interval"] = self.interval
+        address = token["panel_address"]
+        if address.startswith("http"):
+            address = "ws" + address[4:]
+        return f"{address}/api/{self.endpoint}?{urlencode(params)}"
+
+    async def _connect_once(self, stale: dict = None):
+        """read one connection until it closes.
+
+        Returns: `~tuple`: (lines received, rejected token or None)
+        """
+        token = self.token
+        if token is None:
+            token = await self.panel.get_valid_token(stale)
+        received = 0
+        async with self.panel.session.ws_connect(self._url(token), heartbeat=30) as socket:
+            async for message in socket:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    if message.type == aiohttp.WSMsgType.ERROR:
+                        raise socket.exception()
+                    continue
+                for line in message.data.splitlines():
+                    received += 1
+                    if self.accepts(line):
+                        await self._put(line)
+        # the panel closes with 4401 when the token is invalid or expired
+        rejected = token if socket.close_code == 4401 and self.token is None else None
+        return received, rejected
+
+    async def _read(self):
+        attempts = 0
+        stale = None
+        try:
+            while True:
+                try:
+                    received, stale = await self._connect_once(stale)
+                    if received:
+                        attempts = 0
+                except asyncio.CancelledError:
+                    raise
+                except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                    if not self.reconnect:
+                        raise
+                    self.failures += 1
+                    # once per outage, later attempts while it lasts are debug only
+                    level = logging.WARNING if attempts == 0 else logging.DEBUG
+                    logger.log(level, "log stream %s failed: %s", self.endpoint, ex)
+                if not self.reconnect:
+                    return
+                await asyncio.sleep(min(self.max_backoff, self.backoff * 2 ** attempts))
+                attempts += 1
+                self.reconnects += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self._error = ex
+        finally:
+            self._finished = True
+            self._readable.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._task is None and not self._finished:
+            self._readable = asyncio.Event()
+            self._writable = asyncio.Event()
+            self._task = asyncio.ensure_future(self._read())
+        while not self._lines:
+            if self._finished:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+        line = self._lines.popleft()
+        if self._writable is not None:
+            self._writable.set()
+        return line
+
+    async def aclose(self):
+        """stop reading and close the socket."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._finished = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
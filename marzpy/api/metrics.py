@@ -0,0 +1,181 @@
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# first path segment -> name of the identifier that follows it
+_PATH_PARAMETERS = {"user": "{username}", "admin": "{username}", "node": "{id}", "user_template": "{id}"}
+
+
+def template_endpoint(endpoint: str):
+    """``user/alice/reset?x=1`` -> ``user/{username}/reset``, keeps label cardinality low."""
+    parts = endpoint.split("?", 1)[0].split("/")
+    if len(parts) > 1 and parts[0] in _PATH_PARAMETERS:
+        parts[1] = _PATH_PARAMETERS[parts[0]]
+    return "/".join(parts)
+
+
+class RequestContext:
+    """one http request as seen by request hooks."""
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "template",
+        "started",
+        "duration",
+        "status",
+        "bytes_out",
+        "bytes_in",
+        "error",
+        "span",
+    )
+
+    def __init__(self, method: str, endpoint: str):
+        self.method = method.lower()
+        self.endpoint = endpoint
+        self.template = template_endpoint(endpoint)
+        self.started = time.perf_counter()
+        self.duration = None
+        self.status = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.error = None
+        self.span = None
+
+
+class RequestHook:
+    """base of request hooks, pass instances to ``Marzban(hooks=[...])``."""
+
+    def on_request_start(self, context: RequestContext):
+        pass
+
+    def on_request_end(self, context: RequestContext):
+        pass
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class RequestMetrics(RequestHook):
+    """per endpoint latency histograms, in-flight gauges, error and byte counters.
+
+    Endpoints are grouped by template (``user/{username}``). ``to_prometheus()``
+    renders everything in the Prometheus text exposition format.
+
+    Parameters:
+        buckets (``tuple of float``) : histogram bucket upper bounds in seconds
+        prefix (``str``) : metric name prefix
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix: str = "marzpy"):
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.latency = {}
+        self.in_flight = {}
+        self.errors = {}
+        self.bytes_out = {}
+        self.bytes_in = {}
+
+    def on_request_start(self, context: RequestContext):
+        self.in_flight[context.template] = self.in_flight.get(context.template, 0) + 1
+
+    def on_request_end(self, context: RequestContext):
+        key = (context.method, context.template)
+        self.in_flight[context.template] -= 1
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(self.buckets)
+        histogram.observe(context.duration)
+        self.bytes_out[key] = self.bytes_out.get(key, 0) + context.bytes_out
+        self.bytes_in[key] = self.bytes_in.get(key, 0) + context.bytes_in
+        if context.error is not None:
+            error_key = key + (context.status or type(context.error).__name__,)
+            self.errors[error_key] = self.errors.get(error_key, 0) + 1
+
+    def to_prometheus(self):
+        """metrics in Prometheus text exposition format.
+
+        Returns: `~str`
+        """
+        prefix = self.prefix
+        lines = [
+            f"# HELP {prefix}_request_duration_seconds Panel api request latency.",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for (method, endpoint), histogram in self.latency.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), histogram.counts):
+                cumulative += count
+                labels = _labels(method=method, endpoint=endpoint, le=bound)
+                lines.append(f"{prefix}_request_duration_seconds_bucket{labels} {cumulative}")
+            labels = _labels(method=method, endpoint=endpoint)
+            lines.append(f"{prefix}_request_duration_seconds_sum{labels} {histogram.sum}")
+            lines.append(f"{prefix}_request_duration_seconds_count{labels} {histogram.count}")
+        lines += [
+            f"# HELP {prefix}_requests_in_flight Panel api requests currently running.",
+            f"# TYPE {prefix}_requests_in_flight gauge",
+        ]
+        for endpoint, value in self.in_flight.items():
+            lines.append(f"{prefix}_requests_in_flight{_labels(endpoint=endpoint)} {value}")
+        lines += [
+            f"# HELP {prefix}_request_errors_total Failed panel api requests by status.",
+            f"# TYPE {prefix}_request_errors_total counter",
+        ]
+        for (method, endpoint, status), value in self.errors.items():
+            labels = _labels(method=method, endpoint=endpoint, status=status)
+            lines.append(f"{prefix}_request_errors_total{labels} {value}")
+        for name, counter, help_text in (
+            ("request_bytes_sent_total", self.bytes_out, "Request body bytes sent."),
+            ("response_bytes_received_total", self.bytes_in, "Response body bytes received."),
+        ):
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter"]
+            for (method, endpoint), value in counter.items():
+                lines.append(f"{prefix}_{name}{_labels(method=method, endpoint=endpoint)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryHook(RequestHook):
+    """record every request as an OpenTelemetry client span.
+
+    Parameters:
+        tracer : ``opentelemetry.trace.Tracer`` e.g. ``trace.get_tracer("marzpy")``
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def on_request_start(self, context: RequestContext):
+        context.span = self.tracer.start_span(
+            f"{context.method.upper()} {context.template}",
+            attributes={"http.request.method": context.method.upper(), "url.path": context.endpoint},
+        )
+
+    def on_request_end(self, context: RequestContext):
+        span = context.span
+        if span is None:
+            return
+        if context.status is not None:
+            span.set_attribute("http.response.status_code", context.status)
+        if context.error is not None:
+            span.record_exception(context.error)
+        span.end()
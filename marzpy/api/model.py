@@ -0,0 +1,36 @@
+import copy
+from types import MappingProxyType
+
+# shared by all models without unknown fields, so they don't pay for an empty dict
+NO_EXTRA = MappingProxyType({})
+
+
+class Model:
+    """base of api models.
+
+    Models use ``__slots__`` for compact instances. Fields the panel returns
+    but the model does not know are kept in ``extra`` instead of raising.
+    """
+
+    __slots__ = ("extra",)
+    _fields = ()
+
+    def to_payload(self):
+        """request body of the model (known fields only).
+
+        Returns: `~dict`
+        """
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __deepcopy__(self, memo):
+        clone = type(self).__new__(type(self))
+        memo[id(self)] = clone
+        for name in self._fields:
+            setattr(clone, name, copy.deepcopy(getattr(self, name), memo))
+        # NO_EXTRA is shared and read-only, a mappingproxy can not be deep copied
+        clone.extra = self.extra if self.extra is NO_EXTRA else copy.deepcopy(self.extra, memo)
+        return clone
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields[:2])
+        return f"{type(self).__name__}({fields})"
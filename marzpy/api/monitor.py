@@ -0,0 +1,187 @@
+import asyncio, logging, time
+
+logger = logging.getLogger(__name__)
+
+
+class NodeEvent:
+    """something that happened to a node.
+
+    ``kind`` is "status" when the polled status changed (``previous`` is None
+    the first time a node is seen), "reconnect" after a reconnect request
+    succeeded and "reconnect_failed" with ``error`` when it did not.
+    """
+
+    __slots__ = ("kind", "node", "previous", "error", "at")
+
+    def __init__(self, kind: str, node, previous: str = None, error: Exception = None):
+        self.kind = kind
+        self.node = node
+        self.previous = previous
+        self.error = error
+        self.at = time.time()
+
+    @property
+    def status(self):
+        return self.node.status
+
+    def __repr__(self):
+        return f"NodeEvent({self.kind!r}, {self.node.name!r}, {self.previous!r} -> {self.node.status!r})"
+
+
+class NodeMonitor:
+    """poll node status and reconnect failed nodes.
+
+    Reconnects run with at most ``concurrency`` in flight, at most one per
+    node at a time, and back off exponentially per node while it keeps failing.
+
+    Parameters:
+        panel (``Marzban``) : client used for polling and reconnecting
+        interval (``float``) : seconds between polls
+        concurrency (``int``) : maximum reconnect requests in flight
+        backoff (``float``) : seconds before the second reconnect of a node, doubled after each
+        max_backoff (``float``) : upper bound of the wait between reconnects
+        reconnect_statuses (``iterable of str``) : statuses that trigger a reconnect
+        auto_reconnect (``bool``) : only report transitions when False
+        token (``dict``, optional) : Authorization token
+    """
+
+    def __init__(
+        self,
+        panel,
+        interval: float = 30,
+        concurrency: int = 5,
+        backoff: float = 10,
+        max_backoff: float = 600,
+        reconnect_statuses=("disconnected", "error"),
+        auto_reconnect: bool = True,
+        token: dict = None,
+    ):
+        self.panel = panel
+        self.interval = interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.reconnect_statuses = frozenset(reconnect_statuses)
+        self.auto_reconnect = auto_reconnect
+        self.token = token
+        self.nodes = {}
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._failures = {}
+        self._next_attempt = {}
+        self._reconnecting = {}
+        self._subscribers = set()
+        self._task = None
+        self.last_error = None
+
+    def subscribe(self, maxsize: int = 100):
+        """async iterator of NodeEvent.
+
+        A subscriber that falls ``maxsize`` events behind loses the oldest ones.
+        """
+        queue = asyncio.Queue(maxsize)
+        self._subscribers.add(queue)
+        return self._listen(queue)
+
+    async def _listen(self, queue):
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+    def _publish(self, event: NodeEvent):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def poll_once(self):
+        """poll all nodes once, publish transitions and schedule reconnects.
+
+        Returns: `~list`: [NodeEvent] status transitions of this poll
+        """
+        nodes = await self.panel.get_all_nodes(self.token)
+        events = []
+        seen = set()
+        for node in nodes:
+            seen.add(node.id)
+            previous = self.nodes.get(node.id)
+            self.nodes[node.id] = node
+            if previous is None or previous.status != node.status:
+                events.append(NodeEvent("status", node, previous and previous.status))
+            if node.status not in self.reconnect_statuses:
+                self._failures.pop(node.id, None)
+                self._next_attempt.pop(node.id, None)
+            elif self.auto_reconnect:
+                self._schedule_reconnect(node)
+        for node_id in set(self.nodes) - seen:
+            del self.nodes[node_id]
+        for event in events:
+            self._publish(event)
+        return events
+
+    def _schedule_reconnect(self, node):
+        if node.id in self._reconnecting:
+            return
+        if time.monotonic() < self._next_attempt.get(node.id, 0):
+            return
+        task = asyncio.ensure_future(self._reconnect(node))
+        self._reconnecting[node.id] = task
+        task.add_done_callback(lambda _: self._reconnecting.pop(node.id, None))
+
+    async def _reconnect(self, node):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            try:
+                await self.panel.reconnect_node(node.id, self.token)
+            except Exception as ex:
+                event = NodeEvent("reconnect_failed", node, node.status, ex)
+            else:
+                event = NodeEvent("reconnect", node, node.status)
+        # back off after successful requests too, the node needs time to come back;
+        # the counter resets once a poll sees the node healthy again
+        failures = self._failures.get(node.id, 0) + 1
+        self._failures[node.id] = failures
+        self._next_attempt[node.id] = time.monotonic() + min(
+            self.max_backoff, self.backoff * 2 ** (failures - 1)
+        )
+        self._publish(event)
+
+    async def run(self):
+        """poll forever.
+
+        A failed poll is logged, kept in ``last_error`` and tried again after
+        ``interval``; a successful poll clears ``last_error``.
+        """
+        while True:
+            try:
+                await self.poll_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                self.last_error = ex
+                logger.warning("NodeMonitor poll failed: %s", ex)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """run the monitor in a background task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        """stop polling and cancel pending reconnects."""
+        tasks = [task for task in [self._task, *self._reconnecting.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
@@ -1,7 +1,22 @@
 from .send_requests import *
+from .logs import LogStream
+from .model import Model, NO_EXTRA
+
+
+class Node(Model):
+    __slots__ = (
+        "name",
+        "address",
+        "port",
+        "api_port",
+        "certificate",
+        "id",
+        "xray_version",
+        "status",
+        "message",
+    )
+    _fields = __slots__
 
-
-class Node:
     def __init__(
         self,
         name="",
@@ -13,6 +28,7 @@ class Node:
         xray_version="",
         status="",
         message="",
+        **extra
     ):
         self.name = name
         self.address = address
@@ -23,17 +39,18 @@ class Node:
         self.xray_version = xray_version
         self.status = status
         self.message = message
+        self.extra = extra or NO_EXTRA
 
 
 class NodeMethods:
     def __init__(self) -> None:
         pass
 
-    async def add_node(self, token: dict, node: Node):
+    async def add_node(self, token: dict = None, node: Node = None):
         """add new node.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
             node (``api.Node``): node object
 
@@ -41,97 +58,136 @@ class NodeMethods:
             `~object`: information of new node
         """
         return Node(
-            **await send_request(
-                endpoint="node", token=token, method="post", data=node.__dict__
+            **await self.send_request(
+                endpoint="node", token=token, method="post", data=node.to_payload()
             )
         )
 
-    async def get_node_by_id(self, id: int, token: dict):
+    async def get_node_by_id(self, id: int, token: dict = None):
         """get exist node from id.
 
         Parameters:
             id (``int``): id of node
 
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~object`: information of new node
         """
-        return Node(**await send_request(endpoint=f"node/{id}", token=token, method="get"))
+        return Node(**await self.send_request(endpoint=f"node/{id}", token=token, method="get"))
 
-    async def modify_node_by_id(self, id: int, token: dict, node: object):
+    async def modify_node_by_id(self, id: int, token: dict = None, node: object = None):
         """edit exist node from id.
 
         Parameters:
             id (``int``): id of node
 
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
             node (``api.Node``): node object
 
         Returns:
             `~object`: information of new node
         """
-        request = await send_request(
-            endpoint=f"node/{id}", token=token, method="put", data=node.__dict__
+        request = await self.send_request(
+            endpoint=f"node/{id}", token=token, method="put", data=node.to_payload()
         )
         return Node(**request)
 
-    async def delete_node(self, id: int, token: dict):
+    async def delete_node(self, id: int, token: dict = None):
         """delete node from id.
 
         Parameters:
             id (``int``): id of node
 
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~str`: success
         """
-        await send_request(endpoint=f"node/{id}", token=token, method="delete")
+        await self.send_request(endpoint=f"node/{id}", token=token, method="delete")
         return "success"
 
-    async def get_all_nodes(self, token: dict):
+    async def get_all_nodes(self, token: dict = None):
         """get all nodes.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~list of objects`: [Node]
         """
-        request = await send_request(endpoint="nodes", token=token, method="get")
-        node_list = [Node()]
-        for node in request:
-            node_list.append(Node(**node))
-        del node_list[0]
-        return node_list
-
-    async def reconnect_node(self, id: int, token: dict):
+        request = await self.send_request(endpoint="nodes", token=token, method="get")
+        return [Node(**node) for node in request]
+
+    async def reconnect_node(self, id: int, token: dict = None):
         """reconnect from id.
 
         Parameters:
             id (``int``): id of node
 
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~str`: success
         """
-        request = await send_request(
-            endpoint=f"node/{id}/reconnect", token=token, method="post"
+        request = await self.send_request(
+            endpoint=f"node/{id}/reconnect", token=token, method="post", idempotent=True
         )
 
         return "success"
 
-    async def get_nodes_usage(self, token: dict):
+    async def get_nodes_usage(self, token: dict = None, start=None, end=None):
         """get all nodes usage.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
+
+            start (``datetime`` or ``str``, optional): start of the range
+
+            end (``datetime`` or ``str``, optional): end of the range
 
         Returns:
             `~dict`: "usage" : []
         """
-        request = await send_request(endpoint="nodes/usage", token=token, method="get")
-        return request["usages"]
\ No newline at end of file
+        request = await self.send_request(
+            endpoint=f"nodes/usage{usage_query(start, end)}", token=token, method="get"
+        )
+        return request["usages"]
+
+    def stream_node_logs(
+        self,
+        id: int,
+        token: dict = None,
+        interval: float = None,
+        maxsize: int = 1000,
+        policy: str = "drop_oldest",
+        level: str = None,
+        pattern=None,
+        reconnect: bool = True,
+    ):
+        """stream xray logs of a node over WebSocket.
+
+        Parameters:
+            id (``int``): id of node
+
+            token (``dict``, optional): Authorization token
+
+            interval (``float``, optional): seconds the panel batches lines for
+
+            maxsize (``int``): buffered lines
+
+            policy (``str``): "drop_oldest" or "block" when the buffer is full
+
+            level (``str``, optional): lowest level kept: debug, info, warning or error
+
+            pattern (``str`` or ``re.Pattern``, optional): keep only matching lines
+
+            reconnect (``bool``): reopen the socket when it closes
+
+        Returns:
+            `~LogStream`: async iterator of log lines
+        """
+        return LogStream(
+            self, f"node/{id}/logs", token, interval, maxsize, policy, level, pattern, reconnect
+        )
@@ -0,0 +1,216 @@
+import base64, binascii, json
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+_URLSAFE = bytes.maketrans(b"-_", b"+/")
+_WHITESPACE = b" \t\r\n"
+
+
+class ProxyConfig:
+    """one proxy link of a subscription.
+
+    ``uuid`` is the user id (vless/vmess) or password (trojan/shadowsocks) and
+    ``params`` holds transport settings such as type, security, sni, path, host.
+    """
+
+    __slots__ = ("protocol", "host", "port", "uuid", "remark", "params", "raw")
+
+    def __init__(
+        self,
+        protocol: str,
+        host: str,
+        port: int,
+        uuid: str,
+        remark: str = "",
+        params: dict = None,
+        raw: str = "",
+    ):
+        self.protocol = protocol
+        self.host = host
+        self.port = port
+        self.uuid = uuid
+        self.remark = remark
+        self.params = {} if params is None else params
+        self.raw = raw
+
+    @property
+    def transport(self):
+        return self.params.get("type") or self.params.get("net") or "tcp"
+
+    def __repr__(self):
+        return f"ProxyConfig({self.protocol}://{self.host}:{self.port} {self.remark!r})"
+
+
+def _b64decode(data: str):
+    data = data.strip().encode().translate(_URLSAFE)
+    return base64.b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _unquote(value: str):
+    return unquote(value.replace("+", " ")) if "%" in value or "+" in value else value
+
+
+def _parse_query(query: str):
+    params = {}
+    for pair in query.split("&"):
+        if pair:
+            name, _, value = pair.partition("=")
+            params[_unquote(name)] = _unquote(value)
+    return params
+
+
+def _split_server(server: str):
+    """``host:port`` or ``[v6]:port`` -> (host, port)."""
+    server = server.rstrip("/")
+    if server.startswith("["):
+        host, _, port = server[1:].partition("]")
+        port = port[1:]
+    else:
+        host, _, port = server.rpartition(":")
+    return host.lower(), int(port) if port else None
+
+
+def _parse_url(protocol, link):
+    # hand rolled urlsplit: this is the hot path of large subscriptions
+    rest, _, remark = link[len(protocol) + 3 :].partition("#")
+    rest, _, query = rest.partition("?")
+    userinfo, _, server = rest.rpartition("@")
+    host, port = _split_server(server)
+    if not host:
+        raise ValueError(f"no host in {protocol} link")
+    return ProxyConfig(protocol, host, port, unquote(userinfo), unquote(remark), _parse_query(query), link)
+
+
+def _parse_vmess(link):
+    data = json.loads(_b64decode(link[len("vmess://"):]))
+    params = {key: value for key, value in data.items() if key not in ("add", "port", "id", "ps", "v")}
+    if "net" in params:
+        params["type"] = params["net"]
+    return ProxyConfig(
+        "vmess", data.get("add"), int(data.get("port") or 0), data.get("id", ""), data.get("ps", ""), params, link
+    )
+
+
+def _parse_shadowsocks(link):
+    body, _, remark = link[len("ss://"):].partition("#")
+    if "@" not in body:
+        # legacy form: ss://base64(method:password@host:port)#remark
+        body = _b64decode(body).decode()
+    userinfo, _, server = body.rpartition("@")
+    userinfo = unquote(userinfo)
+    if ":" not in userinfo:
+        userinfo = _b64decode(userinfo).decode()
+    method, _, password = userinfo.partition(":")
+    server, _, query = server.partition("?")
+    host, port = _split_server(server)
+    params = _parse_query(query)
+    params["method"] = method
+    return ProxyConfig("shadowsocks", host, port, password, unquote(remark), params, link)
+
+
+_PARSERS = {
+    "vless": lambda link: _parse_url("vless", link),
+    "trojan": lambda link: _parse_url("trojan", link),
+    "vmess": _parse_vmess,
+    "ss": _parse_shadowsocks,
+}
+
+
+def parse_link(link: str):
+    """parse one ``vless://``, ``vmess://``, ``trojan://`` or ``ss://`` link.
+
+    Returns: `~ProxyConfig` or None for unknown or malformed links
+    """
+    scheme, separator, _ = link.partition("://")
+    parser = _PARSERS.get(scheme.lower()) if separator else None
+    if parser is None:
+        return None
+    try:
+        return parser(link.strip())
+    except (ValueError, TypeError, AttributeError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+class SubscriptionDecoder:
+    """incremental subscription body decoder.
+
+    Feed raw body chunks as they arrive; every call returns the configs of the
+    lines completed so far, so a large body is never held decoded in memory.
+    Base64 bodies (standard or urlsafe, with or without padding/newlines) and
+    plain text bodies are both accepted.
+    """
+
+    def __init__(self):
+        self._encoded = b""
+        self._lines = b""
+        self._plain = None
+
+    def feed(self, chunk: bytes):
+        """decode ``chunk`` and return list of ProxyConfig of completed lines."""
+        if self._plain is None:
+            head = (self._encoded + chunk).lstrip(_WHITESPACE)
+            if len(head) < 16 and b"://" not in head:
+                self._encoded = head
+                return []
+            self._plain = b"://" in head[:32]
+            chunk, self._encoded = head, b""
+        if self._plain:
+            return self._parse_lines(chunk)
+        data = self._encoded + chunk.translate(None, _WHITESPACE).translate(_URLSAFE)
+        usable = len(data) - len(data) % 4
+        self._encoded = data[usable:]
+        return self._parse_lines(base64.b64decode(data[:usable]))
+
+    def close(self):
+        """flush the remaining input, returns list of ProxyConfig."""
+        tail = b""
+        if self._encoded:
+            if self._plain:
+                tail = self._encoded
+            else:
+                tail = base64.b64decode(self._encoded + b"=" * (-len(self._encoded) % 4))
+            self._encoded = b""
+        configs = self._parse_lines(tail + b"\n")
+        self._lines = b""
+        return configs
+
+    def _parse_lines(self, data: bytes):
+        data = self._lines + data
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._lines = data
+            return []
+        self._lines = data[end + 1 :]
+        configs = []
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            if line:
+                config = parse_link(line)
+                if config is not None:
+                    configs.append(config)
+        return configs
+
+
+def iter_configs(chunks):
+    """yield ProxyConfig from an iterable of body chunks (bytes)."""
+    decoder = SubscriptionDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+def parse_subscription(body: bytes):
+    """parse a whole subscription body, returns list of ProxyConfig."""
+    return list(iter_configs((body,)))
+
+
+def parse_subscriptions(bodies, processes: int = None, chunksize: int = 1):
+    """parse many subscription bodies in a process pool.
+
+    Parameters:
+        bodies (``iterable of bytes``) : subscription bodies
+        processes (``int``, optional) : worker processes, cpu count by default
+
+    Returns: `~list`: list of ProxyConfig per body, in input order
+    """
+    with ProcessPoolExecutor(processes) as pool:
+        return list(pool.map(parse_subscription, bodies, chunksize=chunksize))
@@ -0,0 +1,151 @@
+import asyncio, time
+from collections import deque
+
+
+class TokenBucket:
+    """token bucket rate limiter.
+
+    Parameters:
+        rate (``float``) : tokens added per second (sustained requests per second)
+        burst (``int``) : bucket size, maximum requests sent back to back
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = None
+        self._loop = None
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """wait until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            # a lock is bound to the loop it first waited on, e.g. a previous asyncio.run()
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+    def metrics(self):
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "available_tokens": self._tokens,
+            "waited_seconds": self.waited,
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limiter.
+
+    Each fast, successful request grows the limit by ``1 / limit`` (about +1 per
+    round of requests); a slow request or one failing with a 5xx/connection
+    error multiplies it by ``backoff``. Requests started before the last
+    decrease were part of the same overload, so they do not decrease it again.
+    A response of ``size`` bytes is slow when it took longer than
+    ``latency_threshold + size / transfer_rate`` seconds, so listing many users
+    is not mistaken for overload.
+
+    Parameters:
+        initial_limit (``int``) : starting number of requests in flight
+        min_limit (``int``) : lower bound of the limit
+        max_limit (``int``) : upper bound of the limit
+        latency_threshold (``float``) : seconds above which a request counts as overload
+        backoff (``float``) : multiplicative decrease factor
+        transfer_rate (``float``) : bytes per second a response may add to the threshold
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        latency_threshold: float = 2.0,
+        backoff: float = 0.5,
+        transfer_rate: float = 1_000_000,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff = backoff
+        self.transfer_rate = transfer_rate
+        self.in_flight = 0
+        self.last_latency = 0.0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+        self._waiters = deque()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def acquire(self):
+        """wait for a free slot, returns start time to pass to ``release``."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._wake()
+                raise
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, failed: bool = False, size: int = 0):
+        """free the slot and adjust the limit from the request outcome.
+
+        Parameters:
+            started (``float``) : value returned by ``acquire``
+            failed (``bool``) : request failed with a 5xx or connection error
+            size (``int``) : response size in bytes
+        """
+        self.in_flight -= 1
+        now = time.monotonic()
+        self.last_latency = now - started
+        threshold = self.latency_threshold + size / self.transfer_rate
+        if failed or self.last_latency > threshold:
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.decreases += 1
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def metrics(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "last_latency": self.last_latency,
+            "decreases": self.decreases,
+        }
@@ -0,0 +1,76 @@
+import aiohttp, asyncio, random, time
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatch
+
+IDEMPOTENT_METHODS = frozenset({"get", "head", "options", "put", "delete"})
+
+
+class RetryPolicy:
+    """when and how long to wait before a failed request is sent again.
+
+    Idempotent verbs (GET/PUT/DELETE) are retried automatically. POST is
+    retried only for calls marked idempotent or endpoints matching one of
+    ``safe_endpoints`` (fnmatch patterns such as ``"user/*/reset"``).
+
+    Parameters:
+        max_attempts (``int``) : total attempts including the first one, 1 disables retries
+        backoff (``float``) : base delay in seconds, doubled after every attempt
+        max_backoff (``float``) : upper bound of a single delay
+        jitter (``bool``) : pick a random delay between 0 and the backoff ("full jitter")
+        retry_statuses (``iterable of int``) : response statuses worth retrying
+        safe_endpoints (``iterable of str``) : POST endpoints that are safe to retry
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10,
+        jitter: bool = True,
+        retry_statuses=(429, 500, 502, 503, 504),
+        safe_endpoints=(),
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.safe_endpoints = tuple(safe_endpoints)
+
+    def is_retryable_call(self, method: str, endpoint: str, idempotent: bool = None):
+        if idempotent is not None:
+            return idempotent
+        if method.lower() in IDEMPOTENT_METHODS:
+            return True
+        path = endpoint.split("?", 1)[0]
+        return any(fnmatch(path, pattern) for pattern in self.safe_endpoints)
+
+    def is_retryable_error(self, ex: Exception):
+        if isinstance(ex, aiohttp.ClientResponseError):
+            return ex.status in self.retry_statuses
+        return isinstance(ex, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    def delay(self, attempt: int, ex: Exception = None):
+        """seconds to sleep after failed ``attempt`` (1 based), honoring Retry-After."""
+        retry_after = _retry_after(ex)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+def _retry_after(ex):
+    headers = getattr(ex, "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -1,21 +1,48 @@
-import aiohttp, json
+import aiohttp
+from datetime import datetime
+from urllib.parse import urlencode
 
+from .serializer import get_serializer
 
-async def send_request(endpoint, token, method, data=None):
+default_serializer = get_serializer()
+
+
+def usage_query(start=None, end=None):
+    """``?start=..&end=..`` query of usage endpoints, datetimes are sent as ISO 8601."""
+    params = {}
+    for name, value in (("start", start), ("end", end)):
+        if value is not None:
+            params[name] = value.isoformat() if isinstance(value, datetime) else value
+    return f"?{urlencode(params)}" if params else ""
+
+
+async def send_request(
+    endpoint, token, method, data=None, session=None, timeout=None, serializer=None, context=None
+):
+    serializer = serializer or default_serializer
     panel_address = token["panel_address"]
     token_type = token["token_type"]
     access_token = token["access_token"]
     request_address = f"{panel_address}/api/{endpoint}"
     headers = {
-        "Content-Type": "application/json",
         "Authorization": f"{token_type} {access_token}",
     }
-    async with aiohttp.request(
+    options = {"timeout": timeout} if timeout is not None else {}
+    if data is not None:
+        headers["Content-Type"] = "application/json"
+        options["data"] = serializer.dumps(data)
+        if context is not None:
+            context.bytes_out = len(options["data"])
+    request = session.request if session is not None else aiohttp.request
+    async with request(
         method=method,
         url=request_address,
         headers=headers,
-        data=json.dumps(data),
-        raise_for_status=True
+        raise_for_status=True,
+        **options
         ) as response :
-        result = await response.json()
-        return result
+        body = await response.read()
+        if context is not None:
+            context.status = response.status
+            context.bytes_in = len(body)
+        return serializer.loads(body) if body.strip() else None
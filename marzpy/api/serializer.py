@@ -0,0 +1,59 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class Serializer:
+    """json encoder/decoder working on bytes.
+
+    Parameters:
+        name (``str``) : name of the backend
+        dumps (``callable``) : object -> bytes
+        loads (``callable``) : bytes -> object
+    """
+
+    def __init__(self, name: str, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return f"Serializer({self.name!r})"
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+SERIALIZERS = {"json": Serializer("json", _stdlib_dumps, json.loads)}
+if ujson is not None:
+    SERIALIZERS["ujson"] = Serializer("ujson", lambda obj: ujson.dumps(obj).encode(), ujson.loads)
+if orjson is not None:
+    SERIALIZERS["orjson"] = Serializer(
+        "orjson", lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), orjson.loads
+    )
+
+
+def get_serializer(name: str = None):
+    """get serializer by name, or the fastest installed one (orjson, ujson, json).
+
+    Parameters:
+        name (``str``, optional) : "orjson", "ujson" or "json"
+
+    Returns: `~Serializer`
+    """
+    if name is not None:
+        if name not in SERIALIZERS:
+            raise ValueError(f"serializer {name!r} is not available, installed: {list(SERIALIZERS)}")
+        return SERIALIZERS[name]
+    for name in ("orjson", "ujson", "json"):
+        if name in SERIALIZERS:
+            return SERIALIZERS[name]
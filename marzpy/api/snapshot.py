@@ -0,0 +1,183 @@
+import heapq, math, time
+from array import array
+from datetime import datetime, timezone
+
+from .user import User
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NUMERIC_FIELDS = (
+    "used_traffic",
+    "lifetime_used_traffic",
+    "data_limit",
+    "expire",
+    "online_at",
+    "sub_updated_at",
+    "created_at",
+    "on_hold_expire_duration",
+)
+NAN = float("nan")
+
+
+def _to_number(value):
+    """number or ISO datetime (as unix time) -> float, missing -> nan."""
+    if value is None or value == "":
+        return NAN
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return NAN
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class UsersSnapshot:
+    """columnar, read-only view of a ``users`` response for analytics.
+
+    Numeric fields are turned into float columns (NumPy arrays when NumPy is
+    installed, ``array('d')`` otherwise) the first time they are used; missing
+    values are ``nan`` and datetimes are unix timestamps. ``User`` objects are
+    only built for the rows that are actually read.
+
+    Parameters:
+        rows (``list of dict``) : users as returned by the panel
+        taken_at (``float``, optional) : unix time of the snapshot
+    """
+
+    def __init__(self, rows: list, taken_at: float = None):
+        self._rows = rows
+        self._columns = {}
+        self.taken_at = time.time() if taken_at is None else taken_at
+
+    @classmethod
+    def from_response(cls, response: dict):
+        return cls(response["users"])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index: int):
+        return User(**self._rows[index])
+
+    def __iter__(self):
+        for row in self._rows:
+            yield User(**row)
+
+    def column(self, name: str):
+        """values of field ``name`` for every row.
+
+        Returns: `~numpy.ndarray or array or list`: float column for numeric fields, list otherwise
+        """
+        column = self._columns.get(name)
+        if column is not None:
+            return column
+        rows = self._rows
+        if name not in NUMERIC_FIELDS:
+            column = [row.get(name) for row in rows]
+        elif numpy is not None:
+            column = numpy.fromiter(
+                (_to_number(row.get(name)) for row in rows), dtype=float, count=len(rows)
+            )
+        else:
+            column = array("d", (_to_number(row.get(name)) for row in rows))
+        self._columns[name] = column
+        return column
+
+    @property
+    def usernames(self):
+        return self.column("username")
+
+    def select(self, indices):
+        """new snapshot with the rows at ``indices``, in that order."""
+        indices = list(indices) if numpy is None else numpy.asarray(indices, dtype=int)
+        rows = self._rows
+        snapshot = UsersSnapshot([rows[i] for i in indices], self.taken_at)
+        for name, column in self._columns.items():
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                snapshot._columns[name] = column[indices]
+            elif isinstance(column, array):
+                snapshot._columns[name] = array("d", (column[i] for i in indices))
+            else:
+                snapshot._columns[name] = [column[i] for i in indices]
+        return snapshot
+
+    def _where(self, mask):
+        if numpy is not None:
+            return self.select(numpy.flatnonzero(mask))
+        return self.select(i for i, keep in enumerate(mask) if keep)
+
+    def sort_by(self, name: str, descending: bool = False, limit: int = None):
+        """rows ordered by a numeric field, missing values last."""
+        column = self.column(name)
+        if numpy is not None:
+            order = numpy.argsort(-column if descending else column, kind="stable")
+            return self.select(order[:limit] if limit is not None else order)
+        valid = [i for i, value in enumerate(column) if value == value]
+        if limit is not None and limit < len(valid):
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            return self.select(pick(limit, valid, key=column.__getitem__))
+        order = sorted(valid, key=column.__getitem__, reverse=descending)
+        order += [i for i, value in enumerate(column) if value != value]
+        return self.select(order[:limit] if limit is not None else order)
+
+    def top(self, name: str = "used_traffic", n: int = 10):
+        """``n`` rows with the highest ``name``."""
+        return self.sort_by(name, descending=True, limit=n)
+
+    def with_status(self, *statuses: str):
+        statuses = set(statuses)
+        return self._where([status in statuses for status in self.column("status")])
+
+    def near_data_limit(self, ratio: float = 0.9):
+        """users with a data limit who used at least ``ratio`` of it."""
+        used = self.column("used_traffic")
+        limit = self.column("data_limit")
+        if numpy is not None:
+            return self._where((limit > 0) & (used >= limit * ratio))
+        return self._where([l > 0 and u >= l * ratio for u, l in zip(used, limit)])
+
+    def expiring_within(self, seconds: float, now: float = None):
+        """users whose ``expire`` falls in the next ``seconds``."""
+        now = time.time() if now is None else now
+        expire = self.column("expire")
+        if numpy is not None:
+            return self._where((expire >= now) & (expire <= now + seconds))
+        return self._where([now <= e <= now + seconds for e in expire])
+
+    def inactive_for(self, seconds: float, now: float = None, include_never: bool = True):
+        """users not online for ``seconds``; ``include_never`` adds users never online."""
+        cutoff = (time.time() if now is None else now) - seconds
+        online_at = self.column("online_at")
+        if numpy is not None:
+            mask = online_at < cutoff
+            if include_never:
+                mask |= numpy.isnan(online_at)
+            return self._where(mask)
+        return self._where(
+            [o < cutoff or (include_never and o != o) for o in online_at]
+        )
+
+    def sum(self, name: str = "used_traffic"):
+        """sum of a numeric field ignoring missing values."""
+        column = self.column(name)
+        if numpy is not None:
+            return float(numpy.nansum(column))
+        return math.fsum(value for value in column if value == value)
+
+    def mean(self, name: str = "used_traffic"):
+        """mean of a numeric field ignoring missing values, nan when empty."""
+        column = self.column(name)
+        if numpy is not None:
+            return float(numpy.nanmean(column)) if numpy.any(~numpy.isnan(column)) else NAN
+        values = [value for value in column if value == value]
+        return math.fsum(values) / len(values) if values else NAN
@@ -1,38 +1,210 @@
-import aiohttp, json, base64
+import aiohttp, json, base64, copy, time
+from collections import OrderedDict
+
+from .bulk import BulkOperation
+from .exceptions import SubscriptionError
+from .parser import SubscriptionDecoder
+from .user import User
+
+
+async def fetch_subscription(
+    session: aiohttp.ClientSession,
+    sub_link: str,
+    endpoint: str,
+    headers: dict = None,
+    timeout: aiohttp.ClientTimeout = None,
+):
+    """get a subscription endpoint.
+
+    Returns: `~tuple`: (status, response headers, body bytes), body is empty for 304
+    """
+    options = {"timeout": timeout} if timeout is not None else {}
+    async with session.request(
+        method="get",
+        url=f"{sub_link}/{endpoint}",
+        headers={"Accept": "application/json", **(headers or {})},
+        **options
+    ) as response:
+        body = await response.read()
+        if response.status >= 400:
+            raise SubscriptionError(sub_link, response.status, body.decode(errors="replace"))
+        return response.status, response.headers, body
+
+
+def decode_subscription(body: bytes):
+    return base64.b64decode(body).decode("utf-8")
 
 
 class Subscription:
     def __init__(self) -> None:
         pass
 
-    async def subsend_request(sub_link: str, endpoint: str):
-        try:
-            async with aiohttp.request(
-                method="get",
-                url = f"{sub_link}/{endpoint}",
-                headers={"Accept": "application/json"}
-                ) as response :
-                #await response.raise_for_status()  # Raise an exception for non-200 status codes
-                result = await response.text()
-            if endpoint:
-                return await response.json()
-            else:
-                return base64.b64decode(result).decode("utf-8")
-        except aiohttp.exceptions.RequestException as ex:
-            print(f"Request Exception: {ex}")
-            return None
+    async def subsend_request(self, sub_link: str, endpoint: str):
+        status, headers, body = await fetch_subscription(
+            self.session, sub_link, endpoint, timeout=self.timeout
+        )
+        if endpoint:
+            return json.loads(body)
+        return decode_subscription(body)
 
     async def get_subscription(self, sub_link: str):
-        """Unknow usage!"""
-        return await Subscription.subsend_request(sub_link, "")
+        """get configs of a subscription link.
+
+        Parameters:
+            sub_link (``str``): subscription url
+
+        Returns:
+            `~str`: decoded configs, one link per line
+        """
+        return await self.subsend_request(sub_link, "")
 
     async def get_subscription_info(self, sub_link: str):
         """get user information.
 
         Parameters:
-            token (``dict``): subscription token
+            sub_link (``str``): subscription url
 
         Returns:
             `~dict`: information of user
         """
-        return await Subscription.subsend_request(sub_link, "info")
+        return await self.subsend_request(sub_link, "info")
+
+    async def iter_subscription_configs(self, sub_link: str, chunk_size: int = 65536):
+        """stream a subscription and parse its links while the body downloads.
+
+        Parameters:
+            sub_link (``str``): subscription url
+
+            chunk_size (``int``): bytes read from the response at a time
+
+        Yields:
+            `~ProxyConfig`: api.parser.ProxyConfig object
+        """
+        decoder = SubscriptionDecoder()
+        async with self.session.request("get", url=f"{sub_link}/", timeout=self.timeout) as response:
+            if response.status >= 400:
+                body = await response.read()
+                raise SubscriptionError(sub_link, response.status, body.decode(errors="replace"))
+            async for chunk in response.content.iter_chunked(chunk_size):
+                for config in decoder.feed(chunk):
+                    yield config
+        for config in decoder.close():
+            yield config
+
+
+class SubscriptionResult:
+    """checked subscription link.
+
+    ``user`` is set for info checks and ``configs`` for content checks.
+    ``cached`` means no request was sent (entry younger than ttl) and
+    ``not_modified`` that the server answered 304 to a conditional request.
+    """
+
+    __slots__ = ("sub_link", "user", "configs", "status", "cached", "not_modified", "fetched_at")
+
+    def __init__(
+        self,
+        sub_link,
+        user=None,
+        configs=None,
+        status=200,
+        cached=False,
+        not_modified=False,
+        fetched_at=None,
+    ):
+        self.sub_link = sub_link
+        self.user = user
+        self.configs = configs
+        self.status = status
+        self.cached = cached
+        self.not_modified = not_modified
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    def __repr__(self):
+        return f"SubscriptionResult({self.sub_link!r}, status={self.status}, cached={self.cached})"
+
+
+class SubscriptionChecker:
+    """check many subscription links concurrently over the client's pooled session.
+
+    Decoded results are cached for ``ttl`` seconds. After that the link is
+    requested again with ``If-None-Match``/``If-Modified-Since`` when the server
+    sent an ``ETag``/``Last-Modified``, so unchanged bodies are not downloaded.
+
+    Parameters:
+        panel (``Marzban``) : client whose session is used
+        ttl (``float``) : seconds a result is served without any request
+        concurrency (``int``) : requests in flight for ``check``
+        maxsize (``int``) : cached links, least recently used are evicted first
+        info (``bool``) : check ``/info`` (api.User) instead of the configs body
+    """
+
+    def __init__(
+        self, panel, ttl: float = 60, concurrency: int = 20, maxsize: int = 10000, info: bool = True
+    ):
+        self.panel = panel
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.maxsize = maxsize
+        self.endpoint = "info" if info else ""
+        self._cache = OrderedDict()
+
+    def _parse(self, sub_link: str, body: bytes, status: int):
+        if self.endpoint:
+            return SubscriptionResult(sub_link, user=User(**json.loads(body)), status=status)
+        return SubscriptionResult(sub_link, configs=decode_subscription(body), status=status)
+
+    def _store(self, sub_link, result, headers, validators=None):
+        validators = dict(validators or {})
+        if headers.get("ETag"):
+            validators["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = headers["Last-Modified"]
+        self._cache[sub_link] = (self._copy(result), validators)
+        self._cache.move_to_end(sub_link)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def _copy(self, result, **changes):
+        # callers get their own User, mutating it must not change the cached entry
+        values = {name: getattr(result, name) for name in SubscriptionResult.__slots__}
+        values["user"] = copy.deepcopy(result.user)
+        values.update(changes)
+        return SubscriptionResult(**values)
+
+    async def fetch(self, sub_link: str):
+        """check one link.
+
+        Returns: `~SubscriptionResult`
+        """
+        entry = self._cache.get(sub_link)
+        if entry is not None and time.time() - entry[0].fetched_at < self.ttl:
+            self._cache.move_to_end(sub_link)
+            return self._copy(entry[0], cached=True)
+        validators = entry[1] if entry is not None else None
+        status, headers, body = await fetch_subscription(
+            self.panel.session, sub_link, self.endpoint, validators, self.panel.timeout
+        )
+        if status == 304 and entry is not None:
+            result = self._copy(
+                entry[0], status=304, not_modified=True, cached=False, fetched_at=time.time()
+            )
+            self._store(sub_link, result, headers, validators)
+            return result
+        result = self._parse(sub_link, body, status)
+        self._store(sub_link, result, headers)
+        return result
+
+    def check(self, sub_links):
+        """check many links with bounded concurrency.
+
+        Returns: `~BulkOperation`: async iterable of BulkResult, result is SubscriptionResult
+        and error a SubscriptionError or aiohttp error
+        """
+        return BulkOperation(self.fetch, sub_links, self.concurrency)
+
+    def invalidate(self, sub_link: str = None):
+        if sub_link is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(sub_link, None)
@@ -0,0 +1,192 @@
+import asyncio, hashlib, json, sqlite3, time
+
+import aiohttp
+
+from .bulk import BulkOperation
+
+# sqlite limits the number of "?" in one statement
+_SQL_CHUNK = 500
+
+
+class SyncEvent:
+    """a user that was created, changed or deleted since the previous sync.
+
+    ``user`` is the current api.User (None for deleted users) and ``previous``
+    the stored row before this sync (None for created users).
+    """
+
+    __slots__ = ("kind", "username", "user", "previous")
+
+    def __init__(self, kind: str, username: str, user=None, previous: dict = None):
+        self.kind = kind
+        self.username = username
+        self.user = user
+        self.previous = previous
+
+    def __repr__(self):
+        return f"SyncEvent({self.kind!r}, {self.username!r})"
+
+
+class SyncStats:
+    def __init__(self):
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.rows_scanned = 0
+        self.created = 0
+        self.changed = 0
+        self.deleted = 0
+
+
+class UserSync:
+    """mirror panel users into a local SQLite database and report only the differences.
+
+    Users are paged through ``iter_users`` sorted by username, so changing
+    fields during the scan does not reorder pages. Users deleted or created
+    during the scan still shift later pages: a stored user missing from the
+    scan is only reported deleted after ``get_user`` answers 404, and a user
+    created during the scan may be reported by the next sync. Every row is
+    hashed and compared with the stored hash; only created, changed and
+    deleted users are emitted and written. The whole scan is one transaction.
+
+    Parameters:
+        panel (``Marzban``) : client used to read users
+        path (``str``) : sqlite database file, ``":memory:"`` by default
+        page_size (``int``) : users requested per page
+        ignore_fields (``iterable of str``) : fields left out of change detection,
+            e.g. ``("online_at", "sub_last_user_agent")``
+        token (``dict``, optional) : Authorization token
+        concurrency (``int``) : ``get_user`` checks in flight for missing users
+    """
+
+    def __init__(
+        self,
+        panel,
+        path: str = ":memory:",
+        page_size: int = 500,
+        ignore_fields=(),
+        token: dict = None,
+        concurrency: int = 10,
+    ):
+        self.panel = panel
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.ignore_fields = frozenset(ignore_fields)
+        self.token = token
+        self.last_stats = None
+        self.db = sqlite3.connect(path)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                hash BLOB NOT NULL,
+                data TEXT NOT NULL,
+                generation INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value INTEGER);
+            """
+        )
+
+    def close(self):
+        self.db.close()
+
+    def _row_hash(self, row: dict):
+        hashed = {key: value for key, value in row.items() if key not in self.ignore_fields}
+        encoded = json.dumps(hashed, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.blake2b(encoded.encode(), digest_size=16).digest()
+
+    def _stored(self, usernames):
+        stored = {}
+        for start in range(0, len(usernames), _SQL_CHUNK):
+            chunk = usernames[start : start + _SQL_CHUNK]
+            query = f"SELECT username, hash, data FROM users WHERE username IN ({','.join('?' * len(chunk))})"
+            stored.update(
+                (username, (digest, data)) for username, digest, data in self.db.execute(query, chunk)
+            )
+        return stored
+
+    def _process_page(self, page, generation, stats):
+        stored = self._stored([user.username for user in page])
+        events = []
+        unchanged = []
+        upserts = []
+        for user in page:
+            row = {**user.extra, **user.to_payload()}
+            digest = self._row_hash(row)
+            previous = stored.get(user.username)
+            if previous is None:
+                events.append(SyncEvent("created", user.username, user))
+                stats.created += 1
+            elif previous[0] != digest:
+                events.append(SyncEvent("changed", user.username, user, json.loads(previous[1])))
+                stats.changed += 1
+            else:
+                unchanged.append((generation, user.username))
+                continue
+            upserts.append((user.username, digest, json.dumps(row, default=str), generation))
+        self.db.executemany("UPDATE users SET generation = ? WHERE username = ?", unchanged)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO users (username, hash, data, generation) VALUES (?, ?, ?, ?)",
+            upserts,
+        )
+        stats.rows_scanned += len(page)
+        return events
+
+    async def sync(self):
+        """scan the panel once, yielding a SyncEvent for every difference.
+
+        ``last_stats`` holds duration, rows scanned and counts once the scan ends.
+        """
+        stats = SyncStats()
+        started = time.perf_counter()
+        last = self.db.execute("SELECT value FROM sync_meta WHERE key = 'generation'").fetchone()
+        generation = (last[0] if last else 0) + 1
+        committed = False
+        try:
+            page = []
+            async for user in self.panel.iter_users(self.token, page_size=self.page_size, sort="username"):
+                page.append(user)
+                if len(page) == self.page_size:
+                    for event in self._process_page(page, generation, stats):
+                        yield event
+                    page = []
+            if page:
+                for event in self._process_page(page, generation, stats):
+                    yield event
+            missing = self.db.execute(
+                "SELECT username, data FROM users WHERE generation < ?", (generation,)
+            ).fetchall()
+            found = []
+            deleted = []
+            async for result in BulkOperation(
+                lambda row: self.panel.get_user(row[0], self.token), missing, self.concurrency
+            ):
+                if result.ok:
+                    found.append(result.result)
+                elif isinstance(result.error, aiohttp.ClientResponseError) and result.error.status == 404:
+                    deleted.append(result.item)
+                else:
+                    raise result.error
+            # skipped by a page shift, not deleted
+            for event in self._process_page(found, generation, stats):
+                yield event
+            self.db.executemany("DELETE FROM users WHERE username = ?", [row[:1] for row in deleted])
+            self.db.execute(
+                "INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('generation', ?)", (generation,)
+            )
+            self.db.commit()
+            committed = True
+            stats.deleted = len(deleted)
+            for username, data in deleted:
+                yield SyncEvent("deleted", username, previous=json.loads(data))
+        finally:
+            if not committed:
+                self.db.rollback()
+            stats.duration = time.perf_counter() - started
+            self.last_stats = stats
+
+    async def run(self, interval: float, handler):
+        """sync every ``interval`` seconds forever, awaiting ``handler(event)`` for each event."""
+        while True:
+            async for event in self.sync():
+                await handler(event)
+            await asyncio.sleep(interval)
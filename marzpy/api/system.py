@@ -5,46 +5,46 @@ class System:
     def __init__(self) -> None:
         pass
 
-    async def get_system_stats(self, token: dict):
+    async def get_system_stats(self, token: dict = None):
         """get server stats.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~dict`: server stats
         """
-        return await send_request(endpoint="system", token=token, method="get")
+        return await self.send_request(endpoint="system", token=token, method="get")
 
-    async def get_inbounds(self, token: dict):
+    async def get_inbounds(self, token: dict = None):
         """get server inbounds.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~dict`: server inbounds
         """
-        return await send_request(endpoint="inbounds", token=token, method="get")
+        return await self.send_request(endpoint="inbounds", token=token, method="get")
 
-    async def get_hosts(self, token: dict):
+    async def get_hosts(self, token: dict = None):
         """get server hosts.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
 
         Returns:
             `~dict`: server hosts
         """
-        return await send_request(endpoint="hosts", token=token, method="get")
+        return await self.send_request(endpoint="hosts", token=token, method="get")
 
-    async def modify_hosts(self, token: dict, data: dict):
+    async def modify_hosts(self, token: dict = None, data: dict = None):
         """get server hosts.
 
         Parameters:
-            token (``dict``): Authorization token
+            token (``dict``, optional): Authorization token
             data (``dict``) : new hosts data
         Returns:
             `~dict`: server hosts
         """
-        return await send_request(endpoint="hosts", token=token, method="put", data=data)
\ No newline at end of file
+        return await self.send_request(endpoint="hosts", token=token, method="put", data=data)
\ No newline at end of file
@@ -1,99 +1,109 @@
 from .send_requests import *
+from .model import Model, NO_EXTRA
 
 
-class Template:
+class Template(Model):
+    __slots__ = (
+        "name",
+        "inbounds",
+        "data_limit",
+        "expire_duration",
+        "username_prefix",
+        "username_suffix",
+        "id",
+    )
+    _fields = __slots__
+
     def __init__(
         self,
         name="",
-        inbounds={},
-        data_limit={},
+        inbounds: dict = None,
+        data_limit=0,
         expire_duration=0,
         username_prefix="",
         username_suffix="",
         id=None,
+        **extra
     ):
         self.name = name
-        self.inbounds = inbounds
+        self.inbounds = {} if inbounds is None else inbounds
         self.data_limit = data_limit
         self.expire_duration = expire_duration
         self.username_prefix = username_prefix
         self.username_suffix = username_suffix
         self.id = id
+        self.extra = extra or NO_EXTRA
 
 
 class TemplateMethods:
-    async def get_all_templates(self, token: dict):
+    async def get_all_templates(self, token: dict = None):
         """get all templates list.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns:
             `~list`: list of templates
         """
-        request = await send_request(endpoint="user_template", token=token, method="get")
-        template_list = [Template()]
-        for user in request:
-            template_list.append(Template(**user))
-        del template_list[0]
-        return template_list
-
-    async def add_template(self, template: Template, token: dict):
+        request = await self.send_request(endpoint="user_template", token=token, method="get")
+        return [Template(**template) for template in request]
+
+    async def add_template(self, template: Template, token: dict = None):
         """add new template.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
             template (``api.template object``) : template
 
         Returns:
             `~object`: information of new template
         """
-        request = await send_request(
-            endpoint="user_template", token=token, method="post", data=template.__dict__
+        request = await self.send_request(
+            endpoint="user_template", token=token, method="post", data=template.to_payload()
         )
         return Template(**request)
 
-    async def get_template_by_id(self, id: int, token: dict):
+    async def get_template_by_id(self, id: int, token: dict = None):
         """get exist template from id.
 
         Parameters:
             id (``id``) : template id
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
         Returns:
             `~object`: information of template
         """
-        request = await send_request(
+        request = await self.send_request(
             endpoint=f"user_template/{id}", token=token, method="get"
         )
 
         return Template(**request)
 
-    async def modify_template_by_id(self, id: int, token: dict, template: Template):
+    async def modify_template_by_id(self, id: int, token: dict = None, template: Template = None):
         """edit exist template from id.
 
         Parameters:
             id (``id``) : template id
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
             template (``object``) template
         Returns:
             `~object`: information of edited template
         """
-        request = await send_request(
+        request = await self.send_request(
             endpoint=f"user_template/{id}",
             token=token,
             method="put",
-            data=template.__dict__,
+            data=template.to_payload(),
         )
         return Template(**request)
 
-    async def delete_template_by_id(self, id: int, token: dict):
+    async def delete_template_by_id(self, id: int, token: dict = None):
         """delete template from id.
 
         Parameters:
             id (``id``) : template id
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
         Returns:
             `~str`: success
         """
-        await send_request(endpoint=f"user_template/{id}", token=token, method="delete")
+        await self.send_request(endpoint=f"user_template/{id}", token=token, method="delete")
         return "success"
\ No newline at end of file
@@ -0,0 +1,172 @@
+import asyncio, heapq, logging, time
+from array import array
+from datetime import datetime, timezone
+
+from .bulk import BulkOperation
+
+logger = logging.getLogger(__name__)
+
+
+class UsageRing:
+    """fixed size ring buffer of (time, bytes) usage deltas of one user or node."""
+
+    __slots__ = ("times", "deltas", "next", "size", "last")
+
+    def __init__(self, capacity: int):
+        self.times = array("d", bytes(8 * capacity))
+        self.deltas = array("d", bytes(8 * capacity))
+        self.next = 0
+        self.size = 0
+        self.last = None
+
+    def record(self, at: float, counter: float):
+        """store the growth of cumulative ``counter`` since the previous reading."""
+        if self.last is not None:
+            # a counter lower than before means it was reset, all of it is new usage
+            delta = counter - self.last if counter >= self.last else counter
+            capacity = len(self.times)
+            self.times[self.next] = at
+            self.deltas[self.next] = delta
+            self.next = (self.next + 1) % capacity
+            self.size = min(self.size + 1, capacity)
+        self.last = counter
+
+    def total(self, since: float = 0):
+        """bytes used in samples taken at or after ``since``."""
+        if not self.size:
+            return 0.0
+        return sum(delta for at, delta in zip(self.times, self.deltas) if at and at >= since)
+
+
+class UsageCollector:
+    """periodically sample traffic counters and answer usage queries locally.
+
+    Users are sampled from ``used_traffic`` (all users through ``iter_users``
+    or only ``usernames`` through concurrent ``get_user`` calls) and nodes from
+    ``get_nodes_usage`` since the collector started. Only the growth between
+    samples is kept, in a ring buffer of ``capacity`` samples per user/node.
+
+    Parameters:
+        panel (``Marzban``) : client used for sampling
+        usernames (``iterable of str``, optional) : users to track, all users when omitted
+        nodes (``bool``) : track node usage too
+        interval (``float``) : seconds between samples
+        capacity (``int``) : samples kept per user or node
+        concurrency (``int``) : ``get_user`` calls in flight when tracking ``usernames``
+        token (``dict``, optional) : Authorization token
+    """
+
+    def __init__(
+        self,
+        panel,
+        usernames=None,
+        nodes: bool = True,
+        interval: float = 60,
+        capacity: int = 1440,
+        concurrency: int = 10,
+        token: dict = None,
+    ):
+        self.panel = panel
+        self.usernames = None if usernames is None else list(usernames)
+        self.track_nodes = nodes
+        self.interval = interval
+        self.capacity = capacity
+        self.concurrency = concurrency
+        self.token = token
+        self.users = {}
+        self.nodes = {}
+        self.since = datetime.now(timezone.utc).replace(microsecond=0)
+        self._task = None
+        self.failures = 0
+
+    def _record(self, series: dict, key, at: float, counter):
+        ring = series.get(key)
+        if ring is None:
+            ring = series[key] = UsageRing(self.capacity)
+        ring.record(at, float(counter or 0))
+
+    async def _sample_users(self, at):
+        if self.usernames is None:
+            async for user in self.panel.iter_users(self.token):
+                self._record(self.users, user.username, at, user.used_traffic)
+            return
+        operation = BulkOperation(
+            lambda username: self.panel.get_user(username, self.token),
+            self.usernames,
+            self.concurrency,
+        )
+        async for result in operation:
+            if result.ok:
+                self._record(self.users, result.item, at, result.result.used_traffic)
+
+    async def _sample_nodes(self, at):
+        # a fixed start keeps the node counters cumulative between samples
+        for usage in await self.panel.get_nodes_usage(self.token, start=self.since):
+            counter = (usage.get("uplink") or 0) + (usage.get("downlink") or 0)
+            self._record(self.nodes, usage.get("node_name"), at, counter)
+
+    async def sample(self):
+        """take one sample of all tracked users and nodes concurrently."""
+        at = time.time()
+        jobs = [self._sample_users(at)]
+        if self.track_nodes:
+            jobs.append(self._sample_nodes(at))
+        await asyncio.gather(*jobs)
+
+    def _series(self, kind: str):
+        if kind not in ("user", "node"):
+            raise ValueError("kind must be 'user' or 'node'")
+        return self.users if kind == "user" else self.nodes
+
+    def total(self, kind: str, key, window: float):
+        """bytes used by a user or node in the last ``window`` seconds."""
+        ring = self._series(kind).get(key)
+        return ring.total(time.time() - window) if ring is not None else 0.0
+
+    def rate(self, kind: str, key, window: float):
+        """average bytes per second of a user or node over the last ``window`` seconds."""
+        return self.total(kind, key, window) / window
+
+    def top(self, kind: str = "user", n: int = 10, window: float = 3600):
+        """``n`` users or nodes with the most traffic in the last ``window`` seconds.
+
+        Returns: `~list`: [(username or node name, bytes)]
+        """
+        since = time.time() - window
+        totals = ((key, ring.total(since)) for key, ring in self._series(kind).items())
+        return heapq.nlargest(n, totals, key=lambda item: item[1])
+
+    async def run(self):
+        """take a sample every ``interval`` seconds until stopped.
+
+        A failed sample is logged and counted in ``failures``; counters are
+        cumulative, so the next sample's delta covers the missed interval.
+        """
+        while True:
+            try:
+                await self.sample()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                self.failures += 1
+                logger.warning("UsageCollector sample failed: %s", ex)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """run the collector in a background task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
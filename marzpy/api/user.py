@@ -1,4 +1,9 @@
 from .send_requests import *
+from .bulk import BulkOperation
+from .model import Model, NO_EXTRA
+from .template import Template
+from urllib.parse import urlencode
+import asyncio, time
 
 async def delete_if_exist(dic,keys:list):
     for key in keys:
@@ -6,32 +11,58 @@ async def delete_if_exist(dic,keys:list):
             del dic[key]
     return dic
 
-class User:
+class User(Model):
+    __slots__ = (
+        "username",
+        "proxies",
+        "inbounds",
+        "expire",
+        "data_limit",
+        "data_limit_reset_strategy",
+        "status",
+        "used_traffic",
+        "lifetime_used_traffic",
+        "created_at",
+        "links",
+        "subscription_url",
+        "excluded_inbounds",
+        "note",
+        "on_hold_timeout",
+        "on_hold_expire_duration",
+        "sub_updated_at",
+        "online_at",
+        "sub_last_user_agent",
+    )
+    _fields = __slots__
+
     def __init__(
         self,
         username: str,
-        proxies: dict,
-        inbounds: dict,  
-        data_limit: float,
+        proxies: dict = None,
+        inbounds: dict = None,
+        data_limit: float = 0,
         data_limit_reset_strategy: str = "no_reset",
         status="",
         expire: float = 0,
         used_traffic=0,
         lifetime_used_traffic=0,
         created_at="",
-        links=[],
+        links: list = None,
         subscription_url="",
-        excluded_inbounds={},
+        excluded_inbounds: dict = None,
         note = "",
         on_hold_timeout= 0,
         on_hold_expire_duration = 0,
         sub_updated_at = 0,
         online_at = 0,
-        sub_last_user_agent:str = ""
+        sub_last_user_agent:str = "",
+        **extra
     ):
+        if not isinstance(username, str):
+            raise TypeError(f"username must be str, not {type(username).__name__}")
         self.username = username
-        self.proxies = proxies
-        self.inbounds = inbounds
+        self.proxies = {} if proxies is None else proxies
+        self.inbounds = {} if inbounds is None else inbounds
         self.expire = expire
         self.data_limit = data_limit
         self.data_limit_reset_strategy = data_limit_reset_strategy
@@ -39,106 +70,160 @@ class User:
         self.used_traffic = used_traffic
         self.lifetime_used_traffic = lifetime_used_traffic
         self.created_at = created_at
-        self.links = links
+        self.links = [] if links is None else links
         self.subscription_url = subscription_url
-        self.excluded_inbounds = excluded_inbounds
+        self.excluded_inbounds = {} if excluded_inbounds is None else excluded_inbounds
         self.note = note
         self.on_hold_timeout = on_hold_timeout
         self.on_hold_expire_duration = on_hold_expire_duration
         self.sub_last_user_agent = sub_last_user_agent
         self.online_at = online_at
         self.sub_updated_at = sub_updated_at
+        self.extra = extra or NO_EXTRA
+
+
+def user_from_template(template: Template, name: str, now: float = None):
+    """build a new User from a template the way the panel applies it.
+
+    The username is ``username_prefix + name + username_suffix``, inbounds and
+    data_limit are copied and a non zero ``expire_duration`` is counted from now.
+    """
+    expire = 0
+    if template.expire_duration:
+        expire = int(time.time() if now is None else now) + template.expire_duration
+    return User(
+        username=f"{template.username_prefix or ''}{name}{template.username_suffix or ''}",
+        proxies={protocol: {} for protocol in template.inbounds},
+        inbounds={protocol: list(tags) for protocol, tags in template.inbounds.items()},
+        data_limit=template.data_limit or 0,
+        expire=expire,
+    )
+
+
+class ProvisionResult:
+    """user created from a template, ``created`` is False when it already existed."""
+
+    __slots__ = ("user", "created", "subscription_url")
+
+    def __init__(self, user: User, created: bool, panel_address: str = ""):
+        self.user = user
+        self.created = created
+        url = user.subscription_url
+        self.subscription_url = f"{panel_address}{url}" if url.startswith("/") else url
+
+    @property
+    def username(self):
+        return self.user.username
+
+    def __repr__(self):
+        return f"ProvisionResult({self.user.username!r}, created={self.created})"
+
+
 class UserMethods:
-    async def add_user(self, user: User, token: dict):
+    async def add_user(self, user: User, token: dict = None):
         """add new user.
 
         Parameters:
             user (``api.User``) : User Object
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~User`: api.User object
         """
         user.status = "active"
         if user.on_hold_expire_duration:
             user.status = "on_hold"
-        request = await send_request(
-            endpoint="user", token=token, method="post", data=user.__dict__
+        request = await self.send_request(
+            endpoint="user", token=token, method="post", data=user.to_payload()
         )
         return User(**request)
 
-    async def get_user(self, user_username: str, token: dict):
+    async def get_user(self, user_username: str, token: dict = None):
         """get exist user information by username.
 
         Parameters:
             user_username (``str``) : username of user
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~User`: api.User object
         """
-        request = await send_request(f"user/{user_username}", token=token, method="get")
+        request = await self.send_request(f"user/{user_username}", token=token, method="get")
         return User(**request)
 
-    async def modify_user(self, user_username: str, token: dict, user: object):
+    async def modify_user(self, user_username: str, token: dict = None, user: object = None):
         """edit exist user by username.
 
         Parameters:
             user_username (``str``) : username of user
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
             user (``api.User``) : User Object
 
         Returns: `~User`: api.User object
         """
-        request = await send_request(f"user/{user_username}", token, "put", user.__dict__)
+        request = await self.send_request(f"user/{user_username}", token, "put", user.to_payload())
         return User(**request)
 
-    async def delete_user(self, user_username: str, token: dict):
+    def user_write_buffer(self, window: float = 0.5, token: dict = None):
+        """buffer that merges field changes of a user made within ``window`` into one PUT.
+
+        Parameters:
+            window (``float``) : seconds changes of a user are collected
+
+            token (``dict``, optional) : Authorization token
+
+        Returns: `~UserWriteBuffer`: api.buffer.UserWriteBuffer object
+        """
+        from .buffer import UserWriteBuffer
+
+        return UserWriteBuffer(self, window, token)
+
+    async def delete_user(self, user_username: str, token: dict = None):
         """delete exist user by username.
 
         Parameters:
             user_username (``str``) : username of user
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~str`: success
         """
-        await send_request(f"user/{user_username}", token, "delete")
+        await self.send_request(f"user/{user_username}", token, "delete")
         return "success"
 
-    async def reset_user_traffic(self, user_username: str, token: dict):
+    async def reset_user_traffic(self, user_username: str, token: dict = None):
         """reset exist user traffic by username.
 
         Parameters:
             user_username (``str``) : username of user
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~str`: success
         """
-        await send_request(f"user/{user_username}/reset", token, "post")
+        await self.send_request(f"user/{user_username}/reset", token, "post", idempotent=True)
         return "success"
     
-    async def revoke_sub(self, user_username: str, token: dict):
+    async def revoke_sub(self, user_username: str, token: dict = None):
         """Revoke users subscription (Subscription link and proxies) traffic by username.
 
         Parameters:
             user_username (``str``) : username of user
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~str`: success
         """
-        request = await send_request(f"user/{user_username}/revoke_sub", token, "post")
+        request = await self.send_request(f"user/{user_username}/revoke_sub", token, "post")
         return User(**request)
     
-    async def get_all_users(self, token: dict, username=None, status=None):
+    async def get_all_users(self, token: dict = None, username=None, status=None):
         """get all users list.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns:
             `~list`: list of users
@@ -151,51 +236,284 @@ class UserMethods:
                 endpoint += f"&status={status}"
             else:
                 endpoint += f"?status={status}"
-        request = await send_request(endpoint, token, "get")
-        user_list = [
-            User(
-                username="",
-                proxies={},
-                inbounds={},
-                expire=0,
-                data_limit=0,
-                data_limit_reset_strategy="",
-            )
-        ]
-        for user in request["users"]:
-            user_list.append(User(**user))
-        del user_list[0]
-        return user_list
-
-    async def reset_all_users_traffic(self, token: dict):
+        request = await self.send_request(endpoint, token, "get")
+        return [User(**user) for user in request["users"]]
+
+    async def iter_users(
+        self,
+        token: dict = None,
+        page_size: int = 500,
+        status: str = None,
+        username=None,
+        sort: str = None,
+    ):
+        """iterate over all users page by page.
+
+        Pages are requested with ``offset``/``limit`` and the next page is
+        fetched while the current one is being consumed, so only about two
+        pages are held in memory at a time.
+
+        Parameters:
+            token (``dict``, optional) : Authorization token
+
+            page_size (``int``) : number of users requested per page
+
+            status (``str``, optional) : filter by user status
+
+            username (``str`` or ``list``, optional) : filter by username(s)
+
+            sort (``str``, optional) : sort field e.g. ``-created_at``
+
+        Yields: `~User`: api.User object
+        """
+        params = {"limit": page_size}
+        if status:
+            params["status"] = status
+        if username:
+            params["username"] = username
+        if sort:
+            params["sort"] = sort
+
+        async def fetch(offset):
+            query = urlencode({**params, "offset": offset}, doseq=True)
+            return await self.send_request(f"users?{query}", token, "get")
+
+        offset = 0
+        pending = asyncio.ensure_future(fetch(offset))
+        try:
+            while pending is not None:
+                page = await pending
+                users = page["users"]
+                offset += len(users)
+                pending = None
+                if len(users) == page_size and offset < page.get("total", offset + 1):
+                    pending = asyncio.ensure_future(fetch(offset))
+                for user in users:
+                    yield User(**user)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def get_users_snapshot(self, token: dict = None, username=None, status=None):
+        """get all users as a columnar snapshot for analytics.
+
+        Parameters:
+            token (``dict``, optional) : Authorization token
+
+            username (``str`` or ``list``, optional) : filter by username(s)
+
+            status (``str``, optional) : filter by user status
+
+        Returns:
+            `~UsersSnapshot`: api.snapshot.UsersSnapshot object
+        """
+        from .snapshot import UsersSnapshot
+
+        params = {}
+        if username:
+            params["username"] = username
+        if status:
+            params["status"] = status
+        endpoint = f"users?{urlencode(params, doseq=True)}" if params else "users"
+        return UsersSnapshot.from_response(await self.send_request(endpoint, token, "get"))
+
+    async def reset_all_users_traffic(self, token: dict = None):
         """reset all users traffic.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~str`: success
         """
-        await send_request("users/reset", token, "post")
+        await self.send_request("users/reset", token, "post", idempotent=True)
         return "success"
 
-    async def get_user_usage(self, user_username: str, token: dict):
+    async def get_user_usage(self, user_username: str, token: dict = None, start=None, end=None):
         """get user usage by username.
 
         Parameters:
             user_username (``str``) : username of user
 
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
-        Returns: `~dict`: dict of user usage
+            start (``datetime`` or ``str``, optional) : start of the range
+
+            end (``datetime`` or ``str``, optional) : end of the range
+
+        Returns: `~list`: usage of user per node
         """
-        return await end_request(f"user/{user_username}/usage", token, "get")["usages"]
+        request = await self.send_request(
+            f"user/{user_username}/usage{usage_query(start, end)}", token, "get"
+        )
+        return request["usages"]
 
-    async def get_all_users_count(self, token: dict):
+    async def get_all_users_count(self, token: dict = None):
         """get all users count.
 
         Parameters:
-            token (``dict``) : Authorization token
+            token (``dict``, optional) : Authorization token
 
         Returns: `~int`: count of users
         """
-        return await self.get_all_users(token)["content"]["total"]
\ No newline at end of file
+        request = await self.send_request("users?offset=0&limit=1", token, "get")
+        return request["total"]
+
+    def bulk_add_users(self, users, token: dict = None, concurrency: int = 10, stop_on_error: bool = False):
+        """add many users with bounded concurrency.
+
+        Parameters:
+            users (``iterable of api.User``) : users to create
+
+            token (``dict``, optional) : Authorization token
+
+            concurrency (``int``) : maximum requests in flight
+
+            stop_on_error (``bool``) : stop at the first failed item
+
+        Returns: `~BulkOperation`: async iterable of BulkResult, result is api.User
+        """
+        return BulkOperation(
+            lambda user: self.add_user(user, token), users, concurrency, stop_on_error
+        )
+
+    def bulk_add_users_from_template(
+        self,
+        template_id: int,
+        count: int = None,
+        usernames=None,
+        token: dict = None,
+        concurrency: int = 10,
+        stop_on_error: bool = False,
+        start: int = 1,
+        skip_existing: bool = True,
+    ):
+        """create users from a user template with bounded concurrency.
+
+        The template is requested once, before the first user is created. Each
+        name gets the template prefix/suffix, so ``count=3`` creates
+        ``<prefix>1<suffix>`` .. ``<prefix>3<suffix>``.
+
+        Parameters:
+            template_id (``int``) : template id
+
+            count (``int``, optional) : number of users named ``start``, ``start + 1``, ...
+
+            usernames (``iterable of str``, optional) : names to use instead of ``count``
+
+            token (``dict``, optional) : Authorization token
+
+            concurrency (``int``) : maximum requests in flight
+
+            stop_on_error (``bool``) : stop at the first failed item
+
+            start (``int``) : first number used with ``count``
+
+            skip_existing (``bool``) : return users the panel already has (409)
+            with ``created=False`` instead of failing
+
+        Returns: `~BulkOperation`: async iterable of BulkResult, result is ProvisionResult
+        """
+        if (count is None) == (usernames is None):
+            raise ValueError("pass either count or usernames")
+        if usernames is None:
+            usernames = (str(number) for number in range(start, start + count))
+        resolved = None
+
+        async def create(name):
+            nonlocal resolved
+            if resolved is None:
+                resolved = asyncio.ensure_future(self.get_template_by_id(template_id, token))
+            user = user_from_template(await resolved, name)
+            try:
+                return ProvisionResult(await self.add_user(user, token), True, self.panel_address)
+            except aiohttp.ClientResponseError as ex:
+                if ex.status != 409 or not skip_existing:
+                    raise
+            existing = await self.get_user(user.username, token)
+            return ProvisionResult(existing, False, self.panel_address)
+
+        return BulkOperation(create, usernames, concurrency, stop_on_error)
+
+    def bulk_modify_users(self, users, token: dict = None, concurrency: int = 10, stop_on_error: bool = False):
+        """edit many users by their ``username`` with bounded concurrency.
+
+        Parameters:
+            users (``iterable of api.User``) : edited users
+
+            token (``dict``, optional) : Authorization token
+
+            concurrency (``int``) : maximum requests in flight
+
+            stop_on_error (``bool``) : stop at the first failed item
+
+        Returns: `~BulkOperation`: async iterable of BulkResult, result is api.User
+        """
+        return BulkOperation(
+            lambda user: self.modify_user(user.username, token, user),
+            users,
+            concurrency,
+            stop_on_error,
+        )
+
+    def bulk_delete_users(self, usernames, token: dict = None, concurrency: int = 10, stop_on_error: bool = False):
+        """delete many users with bounded concurrency.
+
+        Parameters:
+            usernames (``iterable of str``) : usernames of users
+
+            token (``dict``, optional) : Authorization token
+
+            concurrency (``int``) : maximum requests in flight
+
+            stop_on_error (``bool``) : stop at the first failed item
+
+        Returns: `~BulkOperation`: async iterable of BulkResult
+        """
+        return BulkOperation(
+            lambda username: self.delete_user(username, token),
+            usernames,
+            concurrency,
+            stop_on_error,
+        )
+
+    def bulk_reset_users_traffic(self, usernames, token: dict = None, concurrency: int = 10, stop_on_error: bool = False):
+        """reset traffic of many users with bounded concurrency.
+
+        Parameters:
+            usernames (``iterable of str``) : usernames of users
+
+            token (``dict``, optional) : Authorization token
+
+            concurrency (``int``) : maximum requests in flight
+
+            stop_on_error (``bool``) : stop at the first failed item
+
+        Returns: `~BulkOperation`: async iterable of BulkResult
+        """
+        return BulkOperation(
+            lambda username: self.reset_user_traffic(username, token),
+            usernames,
+            concurrency,
+            stop_on_error,
+        )
+
+    def bulk_revoke_subs(self, usernames, token: dict = None, concurrency: int = 10, stop_on_error: bool = False):
+        """revoke subscription of many users with bounded concurrency.
+
+        Parameters:
+            usernames (``iterable of str``) : usernames of users
+
+            token (``dict``, optional) : Authorization token
+
+            concurrency (``int``) : maximum requests in flight
+
+            stop_on_error (``bool``) : stop at the first failed item
+
+        Returns: `~BulkOperation`: async iterable of BulkResult, result is api.User
+        """
+        return BulkOperation(
+            lambda username: self.revoke_sub(username, token),
+            usernames,
+            concurrency,
+            stop_on_error,
+        )
@@ -0,0 +1,214 @@
+import asyncio, functools, inspect, threading
+
+from .marzban import Marzban
+from .api.config import ConfigTransaction
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+class SyncMarzban:
+    """blocking Marzban client for synchronous code.
+
+    Every async method of ``Marzban`` is available as a blocking method with
+    the same name and arguments. Calls are run on one event loop in a
+    background thread, so the pooled session and cached token survive between
+    calls; it is safe to call from many threads at once. Async generators such
+    as ``iter_users`` and log streams become regular iterators.
+
+    Parameters:
+        username (``str``) : admin username
+        password (``str``) : admin password
+        panel_address (``str``) : panel address e.g. https://example.com
+        call_timeout (``float``, optional) : seconds a blocking call waits for its result
+        **options : other ``Marzban`` options
+    """
+
+    def __init__(
+        self, username: str, password: str, panel_address: str, call_timeout: float = None, **options
+    ):
+        self.call_timeout = call_timeout
+        self.panel = Marzban(username, password, panel_address, **options)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="marzpy-loop", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, awaitable):
+        """run an awaitable on the client loop and wait for its result."""
+        if self._loop.is_closed():
+            raise RuntimeError("SyncMarzban is closed")
+        future = asyncio.run_coroutine_threadsafe(_await(awaitable), self._loop)
+        return future.result(self.call_timeout)
+
+    def iterate(self, async_iterator):
+        """turn an async iterator running on the client loop into a blocking iterator."""
+        try:
+            while True:
+                try:
+                    yield self.run(async_iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if hasattr(async_iterator, "aclose") and not self._loop.is_closed():
+                self.run(async_iterator.aclose())
+
+    def xray_config_editor(
+        self,
+        token: dict = None,
+        delay: float = 0.05,
+        restart: bool = False,
+        restart_delay: float = 2.0,
+    ):
+        """blocking ``Marzban.xray_config_editor``.
+
+        Returns: `~SyncXrayConfigEditor`
+        """
+        editor = self.panel.xray_config_editor(token, delay, restart, restart_delay)
+        return SyncXrayConfigEditor(self, editor)
+
+    def user_write_buffer(self, window: float = 0.5, token: dict = None):
+        """blocking ``Marzban.user_write_buffer``.
+
+        Returns: `~SyncUserWriteBuffer`
+        """
+        return SyncUserWriteBuffer(self, self.panel.user_write_buffer(window, token))
+
+    def close(self):
+        """close the session and stop the background loop."""
+        if self._loop.is_closed():
+            return
+        self.run(self.panel.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SyncConfigTransaction(ConfigTransaction):
+    """ConfigTransaction whose ``commit`` blocks, a ``with`` block commits on exit."""
+
+    def __init__(self, editor, sync: SyncMarzban):
+        super().__init__(editor)
+        self._sync = sync
+
+    def commit(self):
+        return self._sync.run(ConfigTransaction.commit(self))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+
+
+class SyncXrayConfigEditor:
+    """blocking XrayConfigEditor, commits from many threads still share PUTs.
+
+    Other attributes (``config``, ``puts``, ``restarts``) are read from the
+    wrapped editor.
+    """
+
+    def __init__(self, sync: SyncMarzban, editor):
+        self._sync = sync
+        self.editor = editor
+
+    def transaction(self):
+        return SyncConfigTransaction(self.editor, self._sync)
+
+    def edit(self, func):
+        return self._sync.run(self.editor.edit(func))
+
+    def refresh(self):
+        return self._sync.run(self.editor.refresh())
+
+    def flush(self):
+        self._sync.run(self.editor.flush())
+
+    def close(self):
+        self._sync.run(self.editor.close())
+
+    def __getattr__(self, name):
+        return getattr(self.editor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SyncUserWriteBuffer:
+    """blocking UserWriteBuffer.
+
+    ``modify`` returns at once with a ``concurrent.futures.Future``; call
+    ``result()`` on it to wait for the merged PUT. Other attributes
+    (``puts``, ``merged``, ``pending``) are read from the wrapped buffer.
+    """
+
+    def __init__(self, sync: SyncMarzban, buffer):
+        self._sync = sync
+        self.buffer = buffer
+
+    def modify(self, user_username: str, changes: dict = None, **fields):
+        async def queue():
+            return self.buffer.modify(user_username, changes, **fields)
+
+        # queued on the loop right away, so invalid fields raise here
+        queued = self._sync.run(queue())
+        return asyncio.run_coroutine_threadsafe(_await(queued), self._sync._loop)
+
+    def flush(self):
+        self._sync.run(self.buffer.flush())
+
+    def close(self):
+        self._sync.run(self.buffer.close())
+
+    def __getattr__(self, name):
+        return getattr(self.buffer, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _blocking(name, method):
+    if inspect.isasyncgenfunction(method):
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.iterate(getattr(self.panel, name)(*args, **kwargs))
+
+    else:
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            result = getattr(self.panel, name)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                return self.run(result)
+            if hasattr(result, "__anext__"):
+                return self.iterate(result)
+            return result
+
+    return wrapper
+
+
+for _name, _method in inspect.getmembers(Marzban, inspect.isfunction):
+    if _name.startswith("_") or hasattr(SyncMarzban, _name):
+        continue
+    if (
+        inspect.iscoroutinefunction(_method)
+        or inspect.isasyncgenfunction(_method)
+        or _name.startswith(("bulk_", "stream_"))
+    ):
+        setattr(SyncMarzban, _name, _blocking(_name, _method))
@@ -0,0 +1,161 @@
+import aiohttp, asyncio
+
+from .marzban import Marzban
+
+
+class FleetResult:
+    """outcome of one call fanned out to every panel.
+
+    ``results`` maps panel name to the returned value and ``errors`` maps panel
+    name to the exception (``asyncio.TimeoutError`` for panels that did not
+    answer in time).
+    """
+
+    def __init__(self, results: dict, errors: dict):
+        self.results = results
+        self.errors = errors
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def merged(self):
+        """list results of all panels flattened to ``[(panel name, item), ...]``."""
+        return [(name, item) for name, value in self.results.items() for item in value]
+
+    def __repr__(self):
+        return f"FleetResult(ok={list(self.results)}, failed={list(self.errors)})"
+
+
+class MarzbanFleet:
+    """many Marzban panels behind one pooled session.
+
+    Calls are sent to all panels concurrently, each bounded by ``timeout``, and
+    return a FleetResult so one slow or broken panel doesn't fail the rest.
+
+    Parameters:
+        panels (``dict``) : panel name -> ``Marzban`` client or
+            ``(username, password, panel_address)`` tuple
+        timeout (``float``) : seconds each panel gets per fanned out call
+        limit (``int``) : total simultaneous connections of the shared pool
+        limit_per_host (``int``) : simultaneous connections per panel (0 = no limit)
+        keepalive_timeout (``float``) : seconds an idle connection is kept open
+        ttl_dns_cache (``int``) : seconds resolved DNS entries are cached
+        **client_options : extra ``Marzban`` options for panels given as tuples
+    """
+
+    def __init__(
+        self,
+        panels: dict = None,
+        timeout: float = 10,
+        limit: int = 200,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 15,
+        ttl_dns_cache: int = 10,
+        **client_options,
+    ):
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.client_options = client_options
+        self.panels = {}
+        self._session = None
+        for name, panel in (panels or {}).items():
+            self.add_panel(name, panel)
+
+    def add_panel(self, name: str, panel):
+        """add a ``Marzban`` client or ``(username, password, panel_address)`` tuple."""
+        if not isinstance(panel, Marzban):
+            panel = Marzban(*panel, **self.client_options)
+        if self._session is not None:
+            panel.session = self._session
+        self.panels[name] = panel
+        return panel
+
+    def remove_panel(self, name: str):
+        return self.panels.pop(name)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """pooled session shared by every panel client."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            for panel in self.panels.values():
+                panel.session = self._session
+        return self._session
+
+    async def call(self, method: str, *args, panels=None, timeout: float = None, **kwargs):
+        """call ``method`` of every panel (or the given panel names) concurrently.
+
+        Parameters:
+            method (``str``) : name of a Marzban method e.g. "get_system_stats"
+            panels (``iterable of str``, optional) : subset of panel names
+            timeout (``float``, optional) : overrides the fleet timeout
+
+        Returns: `~FleetResult`
+        """
+        self.session  # attach the shared pool to every panel before the first call
+        names = list(self.panels if panels is None else panels)
+        timeout = self.timeout if timeout is None else timeout
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.wait_for(getattr(self.panels[name], method)(*args, **kwargs), timeout)
+                for name in names
+            ),
+            return_exceptions=True,
+        )
+        results = {}
+        errors = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, Exception):
+                errors[name] = outcome
+            else:
+                results[name] = outcome
+        return FleetResult(results, errors)
+
+    async def get_system_stats(self, **kwargs):
+        return await self.call("get_system_stats", **kwargs)
+
+    async def get_all_nodes(self, **kwargs):
+        return await self.call("get_all_nodes", **kwargs)
+
+    async def get_nodes_usage(self, **kwargs):
+        return await self.call("get_nodes_usage", **kwargs)
+
+    async def get_user(self, user_username: str, **kwargs):
+        """look the user up on every panel; panels without it report a 404 error."""
+        return await self.call("get_user", user_username, **kwargs)
+
+    async def find_user(self, user_username: str, **kwargs):
+        """find which panel holds a user.
+
+        Returns: `~tuple`: (panel name, api.User), or None when no panel has it
+        """
+        result = await self.get_user(user_username, **kwargs)
+        for name, user in result.results.items():
+            return name, user
+        return None
+
+    async def close(self):
+        """close every panel client and the shared session."""
+        for panel in self.panels.values():
+            await panel.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
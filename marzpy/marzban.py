@@ -1,9 +1,275 @@
+import aiohttp, asyncio, copy, time
+
 from .api import Methods
+from .api.ratelimit import TokenBucket, AdaptiveConcurrencyLimiter
+from .api.retry import RetryPolicy
+from .api.cache import TTLCache
+from .api.serializer import Serializer, get_serializer
+from .api.metrics import RequestContext
+from .api.send_requests import send_request
 
 
 class Marzban(Methods):
-    def __init__(self, username: str, password: str, panel_address: str) -> None:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        panel_address: str,
+        session: aiohttp.ClientSession = None,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        ttl_dns_cache: int = 10,
+        rate_limiter: TokenBucket = None,
+        concurrency_limiter: AdaptiveConcurrencyLimiter = None,
+        retry_policy: RetryPolicy = None,
+        timeout: aiohttp.ClientTimeout = None,
+        cache: TTLCache = None,
+        coalesce_requests: bool = True,
+        serializer: Serializer = None,
+        hooks: list = None,
+    ) -> None:
+        """Marzban panel client.
+
+        The client owns one long-lived ``aiohttp.ClientSession`` which is
+        created on first use and shared by every api method, so keep-alive
+        connections are reused instead of paying a new TCP/TLS handshake
+        per call. Use it as an async context manager or call ``close()``.
+
+        Parameters:
+            username (``str``) : admin username
+            password (``str``) : admin password
+            panel_address (``str``) : panel address e.g. https://example.com
+            session (``aiohttp.ClientSession``) : optional external session,
+                it is never closed by this client
+            limit (``int``) : total number of simultaneous connections
+            limit_per_host (``int``) : simultaneous connections per host (0 = no limit)
+            keepalive_timeout (``float``) : seconds an idle connection is kept open
+            ttl_dns_cache (``int``) : seconds resolved DNS entries are cached
+            rate_limiter (``api.ratelimit.TokenBucket``) : optional limit of requests per second
+            concurrency_limiter (``api.ratelimit.AdaptiveConcurrencyLimiter``) : optional
+                adaptive limit of requests in flight
+            retry_policy (``api.retry.RetryPolicy``) : retry policy, defaults to
+                3 attempts for idempotent calls
+            timeout (``aiohttp.ClientTimeout``) : connect/read/total timeouts of every call,
+                defaults to 10s connect, 30s read and 60s total
+            cache (``api.cache.TTLCache``) : optional cache of slow-changing GET endpoints
+            coalesce_requests (``bool``) : let identical concurrent GETs share one request
+            serializer (``api.serializer.Serializer``) : json backend, defaults to the
+                fastest installed one (orjson, ujson, json)
+            hooks (``list of api.metrics.RequestHook``) : called around every http request,
+                e.g. ``RequestMetrics()`` or ``OpenTelemetryHook(tracer)``
+        """
         super().__init__(username, password, panel_address)
         self.username = username
         self.password = password
         self.panel_address = panel_address
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self._session = session
+        self._owns_session = session is None
+        self._session_loop = None
+        self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout or aiohttp.ClientTimeout(total=60, connect=10, sock_read=30)
+        self.cache = cache
+        self.coalesce_requests = coalesce_requests
+        self._in_flight = {}
+        self.serializer = serializer or get_serializer()
+        self.hooks = list(hooks or ())
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """shared pooled session, created lazily inside the running loop.
+
+        An owned session is created again when the client is used from a new
+        event loop, e.g. by successive ``asyncio.run()`` calls. The old one can
+        not be closed once its loop is finished, so await ``close()`` before
+        each loop ends to release its connections without aiohttp warnings.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._owns_session and self._session is not None and self._session_loop is not loop:
+            # the old loop is finished, its connections cannot be closed from here
+            self._session = None
+            self._in_flight = {}
+            self._token_lock = None
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._owns_session = True
+            self._session_loop = loop
+        return self._session
+
+    @session.setter
+    def session(self, session: aiohttp.ClientSession):
+        """use an external session, it is never closed by this client."""
+        self._session = session
+        self._owns_session = False
+
+    async def _send(self, endpoint, token, method, data, idempotent=None):
+        policy = self.retry_policy
+        attempts = 1
+        if policy.is_retryable_call(method, endpoint, idempotent):
+            attempts = policy.max_attempts
+        for attempt in range(1, attempts + 1):
+            try:
+                return await self._send_once(endpoint, token, method, data)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                if attempt == attempts or not policy.is_retryable_error(ex):
+                    raise
+                await asyncio.sleep(policy.delay(attempt, ex))
+
+    async def _send_once(self, endpoint, token, method, data):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        if self.concurrency_limiter is None:
+            return await self._call(endpoint, token, method, data)
+        started = await self.concurrency_limiter.acquire()
+        # the response size lets the limiter tell big payloads from overload
+        context = RequestContext(method, endpoint)
+        failed = False
+        try:
+            return await self._call(endpoint, token, method, data, context)
+        except aiohttp.ClientResponseError as ex:
+            failed = ex.status >= 500
+            raise
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            failed = True
+            raise
+        finally:
+            self.concurrency_limiter.release(started, failed, context.bytes_in)
+
+    async def _call(self, endpoint, token, method, data, context=None):
+        if not self.hooks:
+            return await send_request(
+                endpoint,
+                token,
+                method,
+                data,
+                session=self.session,
+                timeout=self.timeout,
+                serializer=self.serializer,
+                context=context,
+            )
+        context = context or RequestContext(method, endpoint)
+        for hook in self.hooks:
+            hook.on_request_start(context)
+        try:
+            return await send_request(
+                endpoint,
+                token,
+                method,
+                data,
+                session=self.session,
+                timeout=self.timeout,
+                serializer=self.serializer,
+                context=context,
+            )
+        except BaseException as ex:
+            context.error = ex
+            context.status = getattr(ex, "status", None)
+            raise
+        finally:
+            context.duration = time.perf_counter() - context.started
+            for hook in self.hooks:
+                hook.on_request_end(context)
+
+    async def send_request(self, endpoint, token=None, method="get", data=None, idempotent=None):
+        """send request to panel api.
+
+        When ``token`` is omitted the client's cached token is used; it is
+        refreshed before expiry and once more if the panel answers 401.
+        Failed calls are retried according to ``retry_policy``; ``idempotent``
+        overrides whether this call may be sent twice. GETs of endpoints
+        configured in ``cache`` are served from it and writes invalidate it;
+        identical concurrent GETs share one request when ``coalesce_requests`` is on,
+        but a GET sent after a write never joins one that started before it.
+        """
+        if method.lower() != "get":
+            try:
+                return await self._send_authorized(endpoint, token, method, data, idempotent)
+            finally:
+                if self.cache is not None:
+                    self.cache.invalidate(endpoint.split("?", 1)[0])
+                # GETs sent from now on must see this write, so they do not join
+                # requests that started before it (those finish for their callers)
+                self._in_flight.clear()
+        path = endpoint.split("?", 1)[0]
+        key = (None if token is None else token["access_token"], endpoint, path)
+        cached = self.cache is not None and self.cache.is_cached(path)
+        if cached:
+            hit, result = self.cache.get(key)
+            if hit:
+                return result
+
+        async def fetch():
+            # a write finishing while this GET is in flight makes its response stale
+            generation = self.cache.generation(path) if cached else None
+            result = await self._send_authorized(endpoint, token, method, data, idempotent)
+            if cached:
+                self.cache.set(key, path, result, generation)
+            return result
+
+        if not self.coalesce_requests:
+            return await fetch()
+        return await self._single_flight(key, fetch)
+
+    async def _single_flight(self, key, fetch):
+        """share one in-flight request between concurrent callers of the same key."""
+        task = self._in_flight.get(key)
+        if task is not None:
+            return copy.deepcopy(await asyncio.shield(task))
+        task = asyncio.ensure_future(fetch())
+        self._in_flight[key] = task
+
+        def forget(_):
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    async def _send_authorized(self, endpoint, token, method, data, idempotent):
+        if token is not None:
+            return await self._send(endpoint, token, method, data, idempotent)
+        token = await self.get_valid_token()
+        try:
+            return await self._send(endpoint, token, method, data, idempotent)
+        except aiohttp.ClientResponseError as ex:
+            if ex.status != 401:
+                raise
+        token = await self.get_valid_token(stale=token)
+        return await self._send(endpoint, token, method, data, idempotent)
+
+    def limiter_metrics(self):
+        """current state of the configured limiters.
+
+        Returns: `~dict`: {"rate_limiter": dict or None, "concurrency_limiter": dict or None}
+        """
+        return {
+            "rate_limiter": self.rate_limiter and self.rate_limiter.metrics(),
+            "concurrency_limiter": self.concurrency_limiter and self.concurrency_limiter.metrics(),
+        }
+
+    async def close(self):
+        """close the pooled session and release its connections."""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
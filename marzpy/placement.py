@@ -0,0 +1,165 @@
+import hashlib
+from bisect import bisect
+
+
+def _hash(key: str):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """weighted consistent-hash ring.
+
+    Weights are relative: every panel gets ``round(replicas * weight / mean
+    weight)`` points, so only the ratios matter and equal weights give the same
+    ring at any scale. A key belongs to the first point at or after its hash.
+    Adding or removing a panel only moves the keys of the points that changed
+    owner.
+
+    Parameters:
+        weights (``dict``) : panel name -> weight (relative capacity)
+        replicas (``int``) : ring points of a panel with the mean weight
+    """
+
+    def __init__(self, weights: dict = None, replicas: int = 100):
+        self.replicas = replicas
+        self.weights = {}
+        self._points = []
+        self._owners = {}
+        self.weights = dict(weights or {})
+        self._rebuild()
+
+    def _rebuild(self):
+        self._owners = {}
+        if self.weights:
+            mean = sum(self.weights.values()) / len(self.weights) or 1
+            # sorted names so a hash collision goes to the same panel in every process
+            for name in sorted(self.weights):
+                count = max(1, round(self.replicas * self.weights[name] / mean))
+                for replica in range(count):
+                    self._owners.setdefault(_hash(f"{name}#{replica}"), name)
+        self._points = sorted(self._owners)
+
+    def add(self, name: str, weight: float = 1):
+        self.weights[name] = weight
+        self._rebuild()
+
+    def remove(self, name: str):
+        del self.weights[name]
+        self._rebuild()
+
+    def get(self, key: str):
+        """panel name that owns ``key``."""
+        if not self._points:
+            raise LookupError("hash ring is empty")
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def copy(self):
+        ring = HashRing(replicas=self.replicas)
+        ring.weights = dict(self.weights)
+        ring._points = list(self._points)
+        ring._owners = dict(self._owners)
+        return ring
+
+    def __contains__(self, name):
+        return name in self.weights
+
+    def __len__(self):
+        return len(self.weights)
+
+
+class Move:
+    __slots__ = ("username", "source", "target")
+
+    def __init__(self, username: str, source: str, target: str):
+        self.username = username
+        self.source = source
+        self.target = target
+
+    def __repr__(self):
+        return f"Move({self.username!r}, {self.source!r} -> {self.target!r})"
+
+
+class UserPlacement:
+    """shard users over the panels of a MarzbanFleet with a consistent-hash ring.
+
+    A username is routed to its panel locally, so lookups never query other
+    panels. Weights come from ``get_system_stats`` through ``capacity``.
+
+    Parameters:
+        fleet (``MarzbanFleet``) : panels users are spread over
+        ring (``HashRing``, optional) : ring to use, equal weights by default
+        capacity (``callable``) : system stats dict -> panel weight,
+            GiB of memory by default
+    """
+
+    def __init__(self, fleet, ring: HashRing = None, capacity=None):
+        self.fleet = fleet
+        self.ring = ring or HashRing(dict.fromkeys(fleet.panels, 1))
+        self.capacity = capacity or (lambda stats: stats["mem_total"] / 1024**3)
+
+    async def refresh_weights(self):
+        """ring weighted by current panel capacity, the live ring is not changed.
+
+        Users have to be moved before routing follows the new ring: pass it to
+        ``rebalance_plan``, migrate the moves, then set ``placement.ring``.
+        Panels whose stats could not be read keep their current weight.
+
+        Returns: `~HashRing`: proposed ring
+        """
+        stats = await self.fleet.get_system_stats()
+        weights = {name: self.ring.weights.get(name, 1) for name in self.fleet.panels}
+        for name, result in stats.results.items():
+            weights[name] = self.capacity(result)
+        return HashRing(weights, self.ring.replicas)
+
+    def panel_name(self, username: str):
+        return self.ring.get(username)
+
+    def panel_for(self, username: str):
+        """Marzban client that holds ``username``."""
+        return self.fleet.panels[self.ring.get(username)]
+
+    async def add_user(self, user, token: dict = None):
+        return await self.panel_for(user.username).add_user(user, token)
+
+    async def get_user(self, user_username: str, token: dict = None):
+        return await self.panel_for(user_username).get_user(user_username, token)
+
+    async def modify_user(self, user_username: str, token: dict = None, user=None):
+        return await self.panel_for(user_username).modify_user(user_username, token, user)
+
+    async def delete_user(self, user_username: str, token: dict = None):
+        return await self.panel_for(user_username).delete_user(user_username, token)
+
+    def plan(self, usernames, ring: HashRing):
+        """moves needed for ``usernames`` placed by the current ring to follow ``ring``.
+
+        Returns: `~list`: [Move]
+        """
+        moves = []
+        for username in usernames:
+            source = self.ring.get(username)
+            target = ring.get(username)
+            if source != target:
+                moves.append(Move(username, source, target))
+        return moves
+
+    async def rebalance_plan(self, ring: HashRing, page_size: int = 500):
+        """scan every panel and list users that are not on the panel ``ring`` assigns them.
+
+        Typical use after adding a panel::
+
+            ring = placement.ring.copy()
+            ring.add("new-panel", weight)
+            moves = await placement.rebalance_plan(ring)
+
+        Returns: `~list`: [Move]
+        """
+        moves = []
+        for name, panel in self.fleet.panels.items():
+            async for user in panel.iter_users(page_size=page_size):
+                target = ring.get(user.username)
+                if target != name:
+                    moves.append(Move(user.username, name, target))
+        return moves
@@ -13,5 +13,6 @@ setup(
     keywords=["marzpy", "Marzban", "Gozargah", "Marzban python", "Marzban API"],
     packages=find_packages(),
     install_requires=["aiohttp"],
+    extras_require={"speedups": ["orjson"]},
     classifiers=["Programming Language :: Python :: 3"],
 )
@@ -0,0 +1,57 @@
+import asyncio, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from aiohttp import web
+from mock_panel import MockPanel
+from marzpy import Marzban
+from marzpy.api.cache import TTLCache
+
+
+class SlowHostsPanel(MockPanel):
+    """answers GET /api/hosts with the hosts it had when the request arrived, after a delay."""
+
+    async def get_hosts(self, request):
+        hosts = dict(self.hosts)
+        await asyncio.sleep(0.2)
+        return web.json_response(hosts)
+
+
+def test_get_in_flight_during_write_is_not_cached():
+    async def main():
+        mock = SlowHostsPanel(users=1)
+        address = await mock.start()
+        try:
+            async with Marzban("admin", "admin", address, cache=TTLCache(ttl=60)) as panel:
+                await panel.get_token()
+                slow_get = asyncio.ensure_future(panel.get_hosts())
+                await asyncio.sleep(0.05)
+                await panel.modify_hosts(data={"NEW": []})
+                before = await slow_get
+                after = await panel.get_hosts()
+                return before, after
+        finally:
+            await mock.stop()
+
+    before, after = asyncio.run(main())
+    assert "NEW" not in before
+    assert after == {"NEW": []}
+
+
+def test_get_after_write_does_not_join_older_request():
+    async def main():
+        mock = SlowHostsPanel(users=1)
+        address = await mock.start()
+        try:
+            async with Marzban("admin", "admin", address) as panel:
+                await panel.get_token()
+                slow_get = asyncio.ensure_future(panel.get_hosts())
+                await asyncio.sleep(0.05)
+                await panel.modify_hosts(data={"NEW": []})
+                after = await panel.get_hosts()
+                await slow_get
+                return after
+        finally:
+            await mock.stop()
+
+    assert asyncio.run(main()) == {"NEW": []}
@@ -0,0 +1,48 @@
+import asyncio, os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from mock_panel import MockPanel
+from marzpy import Marzban
+from marzpy.api.sync import UserSync
+
+
+def test_delete_during_scan_does_not_report_shifted_user():
+    async def main():
+        mock = MockPanel(users=30)
+        address = await mock.start()
+        try:
+            async with Marzban("admin", "admin", address) as panel:
+                sync = UserSync(panel, page_size=10)
+                assert len([event async for event in sync.sync()]) == 30
+
+                iter_users = panel.iter_users
+
+                async def delete_after_first_page(*args, **kwargs):
+                    async for index, user in _enumerate(iter_users(*args, **kwargs)):
+                        if index == 9:
+                            del mock.users["user000000"]
+                        yield user
+
+                panel.iter_users = delete_after_first_page
+                shifted = [event async for event in sync.sync()]
+                stored = {row[0] for row in sync.db.execute("SELECT username FROM users")}
+                panel.iter_users = iter_users
+                following = [event async for event in sync.sync()]
+                sync.close()
+                return shifted, stored, following
+        finally:
+            await mock.stop()
+
+    shifted, stored, following = asyncio.run(main())
+    # user000000 was read before it was deleted, user000010 was skipped by the shifted page
+    assert shifted == []
+    assert "user000010" in stored and len(stored) == 30
+    assert [(event.kind, event.username) for event in following] == [("deleted", "user000000")]
+
+
+async def _enumerate(iterator):
+    index = 0
+    async for item in iterator:
+        yield index, item
+        index += 1